@@ -0,0 +1,233 @@
+# agno_pipeline/agents/answer_cache.py
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from qdrant_client.models import (
+    VectorParams, Distance, PointStruct, Filter, FieldCondition, MatchValue, MatchAny, FilterSelector
+)
+
+from agno_pipeline.config import (
+    ANSWER_CACHE_BACKEND,
+    ANSWER_CACHE_MAX_DISTANCE,
+    ANSWER_CACHE_SIZE,
+    ANSWER_CACHE_TTL_SECONDS,
+    ANSWER_CACHE_COLLECTION,
+)
+from agno_pipeline.db.mongo_client import mongo_client
+from agno_pipeline.db.qdrant_client import qdrant_client
+from agno_pipeline.db.vector_config import as_float32, to_wire
+from agno_pipeline.metrics import instrumented, count_cache
+
+logger = logging.getLogger("answer_cache")
+logger.setLevel(logging.INFO)
+
+
+def _normalize(vec) -> np.ndarray:
+    vec = as_float32(vec)
+    norm = float(np.linalg.norm(vec)) or 1.0
+    return vec / norm
+
+
+class LocalAnswerIndex:
+    """In-process index: brute-force cosine (one matrix-vector product) over at most max_items vectors."""
+
+    def __init__(self, max_items: int = ANSWER_CACHE_SIZE):
+        self.max_items = max_items
+        self._entries = OrderedDict()  # entry id -> entry
+        self._by_fact: Dict[str, set] = {}
+        self._matrix = None  # (ids, stacked normalized vectors), rebuilt after changes
+
+    def _stacked(self):
+        if self._matrix is None:
+            ids = list(self._entries)
+            vectors = np.stack([self._entries[i]["vector"] for i in ids]) if ids else None
+            self._matrix = (ids, vectors)
+        return self._matrix
+
+    async def search(self, vector, min_similarity: float, scope: dict) -> Optional[dict]:
+        ids, vectors = self._stacked()
+        if vectors is None:
+            return None
+        sims = vectors @ _normalize(vector)
+        best, best_sim = None, min_similarity
+        for i in np.argsort(-sims):
+            if sims[i] < best_sim:
+                break
+            entry = self._entries[ids[i]]
+            if entry["scope"] == scope:
+                best = entry
+                break
+        if best is not None:
+            self._entries.move_to_end(best["id"])  # LRU order only; the matrix stays valid
+        return best
+
+    async def add(self, entry: dict):
+        entry = dict(entry, vector=_normalize(entry["vector"]))
+        self._entries[entry["id"]] = entry
+        self._matrix = None
+        for fid in entry["used_facts"]:
+            self._by_fact.setdefault(fid, set()).add(entry["id"])
+        while len(self._entries) > self.max_items:
+            _, old = self._entries.popitem(last=False)
+            self._unlink(old)
+            self._matrix = None
+
+    async def remove(self, entry_id: str):
+        entry = self._entries.pop(entry_id, None)
+        if entry is not None:
+            self._unlink(entry)
+            self._matrix = None
+
+    async def invalidate_facts(self, fact_ids: List[str]):
+        for fid in fact_ids:
+            for entry_id in list(self._by_fact.get(fid, ())):
+                await self.remove(entry_id)
+
+    def _unlink(self, entry: dict):
+        for fid in entry["used_facts"]:
+            ids = self._by_fact.get(fid)
+            if ids is not None:
+                ids.discard(entry["id"])
+                if not ids:
+                    del self._by_fact[fid]
+
+
+class QdrantAnswerIndex:
+    """Shared index in a dedicated Qdrant collection, visible to every API pod."""
+
+    def __init__(self, collection_name: str = ANSWER_CACHE_COLLECTION):
+        self.collection_name = collection_name
+        self._ready = False
+
+    def _ensure_collection(self, dim: int):
+        if self._ready:
+            return
+        client = qdrant_client.client
+        if self.collection_name not in [c.name for c in client.get_collections().collections]:
+            client.create_collection(
+                collection_name=self.collection_name,
+                vectors_config=VectorParams(size=dim, distance=Distance.COSINE)
+            )
+        self._ready = True
+
+    @instrumented("qdrant", "answer_cache_search")
+    def _search(self, vector, min_similarity, scope):
+        self._ensure_collection(len(vector))
+        hits = qdrant_client.client.search(
+            collection_name=self.collection_name,
+            query_vector=vector,
+            query_filter=Filter(must=[FieldCondition(key=f"scope.{k}", match=MatchValue(value=v))
+                                      for k, v in scope.items()]),
+            score_threshold=min_similarity,
+            limit=1,
+            with_payload=True
+        )
+        return dict(hits[0].payload, id=str(hits[0].id)) if hits else None
+
+    @instrumented("qdrant", "answer_cache_add")
+    def _add(self, entry):
+        self._ensure_collection(len(entry["vector"]))
+        payload = {k: v for k, v in entry.items() if k not in ("id", "vector")}
+        qdrant_client.client.upsert(
+            collection_name=self.collection_name,
+            points=[PointStruct(id=entry["id"], vector=to_wire(entry["vector"]), payload=payload)]
+        )
+
+    @instrumented("qdrant", "answer_cache_delete")
+    def _delete(self, flt):
+        # workers invalidate without ever having searched or added, so _ready is not enough
+        if self._ready or qdrant_client.client.collection_exists(self.collection_name):
+            qdrant_client.client.delete(collection_name=self.collection_name,
+                                        points_selector=FilterSelector(filter=flt))
+
+    async def search(self, vector, min_similarity, scope):
+        return await asyncio.to_thread(self._search, vector, min_similarity, scope)
+
+    async def add(self, entry):
+        await asyncio.to_thread(self._add, entry)
+
+    async def remove(self, entry_id: str):
+        await asyncio.to_thread(qdrant_client.client.delete, self.collection_name, [entry_id])
+
+    async def invalidate_facts(self, fact_ids: List[str]):
+        flt = Filter(must=[FieldCondition(key="used_facts", match=MatchAny(any=list(fact_ids)))])
+        await asyncio.to_thread(self._delete, flt)
+
+
+class SemanticAnswerCache:
+    """
+    Answers keyed by query embedding: a lookup hits when a cached query lies within
+    max_distance (cosine) and was asked with the same scope (e.g. top_k).
+    Entries snapshot the status of their used_facts; a hit is only served if every
+    fact still exists with that status, so changes made by other processes
+    (verification, scoring, pruning) invalidate it too.
+    """
+
+    def __init__(self, index, max_distance: float = ANSWER_CACHE_MAX_DISTANCE,
+                 ttl: float = ANSWER_CACHE_TTL_SECONDS):
+        self.index = index
+        self.max_distance = max_distance
+        self.ttl = ttl
+
+    async def lookup(self, vector: np.ndarray, scope: dict) -> Optional[Dict[str, Any]]:
+        try:
+            entry = await self.index.search(vector, 1.0 - self.max_distance, scope)
+        except Exception:
+            logger.exception("Answer cache lookup failed")
+            return None
+        if entry is None:
+            count_cache("answer", 0, 1)
+            return None
+        if entry["expires_at"] <= time.time() or not await self._facts_unchanged(entry["fact_status"]):
+            await self.index.remove(entry["id"])
+            count_cache("answer", 0, 1)
+            return None
+        count_cache("answer", 1, 0)
+        return {"answer": entry["answer"], "used_facts": entry["used_facts"]}
+
+    async def store(self, vector: np.ndarray, scope: dict, answer: str, used_facts: List[dict]):
+        entry = {
+            "id": str(uuid.uuid4()),
+            "vector": vector,
+            "scope": scope,
+            "answer": answer,
+            "used_facts": [f.get("fact_id") for f in used_facts],
+            "fact_status": {f.get("fact_id"): f.get("status") for f in used_facts},
+            "expires_at": time.time() + self.ttl,
+        }
+        try:
+            await self.index.add(entry)
+        except Exception:
+            logger.exception("Answer cache store failed")
+
+    async def invalidate_facts(self, fact_ids: List[str]):
+        if not fact_ids:
+            return
+        try:
+            await self.index.invalidate_facts(fact_ids)
+        except Exception:
+            logger.exception("Answer cache invalidation failed for %d facts", len(fact_ids))
+
+    async def _facts_unchanged(self, snapshot: Dict[str, str]) -> bool:
+        if not snapshot:
+            return True
+        current = await mongo_client.get_fact_statuses(list(snapshot))
+        return all(current.get(fid) == status for fid, status in snapshot.items())
+
+
+def _make_index():
+    if ANSWER_CACHE_BACKEND == "qdrant":
+        return QdrantAnswerIndex()
+    if ANSWER_CACHE_BACKEND == "local":
+        return LocalAnswerIndex()
+    return None
+
+
+_index = _make_index()
+answer_cache = SemanticAnswerCache(_index) if _index is not None else None
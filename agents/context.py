@@ -0,0 +1,99 @@
+# agno_pipeline/agents/context.py
+"""
+Token-budgeted prompt construction for the query-time agent.
+
+Prompt length drives vLLM prefill time and KV-cache use, so the context is packed
+under CONTEXT_MAX_TOKENS instead of concatenating every reranked fact:
+  - facts are taken greedily in rerank-score order
+  - a fact whose word set overlaps an already packed one by >= CONTEXT_DEDUP_JACCARD
+    is dropped as a near-duplicate
+  - each fact is cut to CONTEXT_FACT_MAX_TOKENS (and to whatever budget is left)
+  - the user query itself is cut to CONTEXT_QUERY_SHARE of the budget (keeping its end,
+    where the question usually is), so the prompt can never outgrow the budget
+The answer's max_tokens is bounded by what remains of VLLM_MAX_MODEL_LEN.
+Tokens are estimated with approx_tokens (the same estimate used to size rerank batches).
+"""
+import re
+from typing import Any, Dict, List, Set, Tuple
+
+from agno_pipeline.config import (
+    CONTEXT_MAX_TOKENS,
+    CONTEXT_FACT_MAX_TOKENS,
+    CONTEXT_MIN_FACT_TOKENS,
+    CONTEXT_DEDUP_JACCARD,
+    CONTEXT_QUERY_SHARE,
+    ANSWER_MAX_TOKENS,
+    VLLM_MAX_MODEL_LEN,
+)
+from agno_pipeline.agents.trust import effective_trust
+from agno_pipeline.models.reranker import approx_tokens
+
+PROMPT_HEADER = "Use the following facts to answer the query:\n"
+_WORD = re.compile(r"\w+")
+
+
+def _words(text: str) -> Set[str]:
+    return set(_WORD.findall(text.lower()))
+
+
+def _near_duplicate(words: Set[str], packed: List[Set[str]], threshold: float) -> bool:
+    for other in packed:
+        union = len(words | other)
+        if union and len(words & other) / union >= threshold:
+            return True
+    return False
+
+
+def truncate_to_tokens(text: str, max_tokens: int, keep_end: bool = False) -> str:
+    """Cut text to about max_tokens at a word boundary (inverse of approx_tokens)."""
+    if approx_tokens(text) <= max_tokens:
+        return text
+    chars = max(0, (max_tokens - 1) * 4)
+    if keep_end:
+        cut = text[len(text) - chars:] if chars else ""
+        if " " in cut:
+            cut = cut.split(" ", 1)[1]
+        return "..." + cut.lstrip()
+    cut = text[:chars]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip() + "..."
+
+
+def build_context(user_query: str, scored_facts: List[Tuple[Dict[str, Any], float]],
+                  max_tokens: int = CONTEXT_MAX_TOKENS) -> Dict[str, Any]:
+    """
+    Pack (fact, rerank score) pairs into a prompt under max_tokens.
+    Returns {'prompt', 'used_facts' (facts actually in the prompt), 'prompt_tokens', 'max_tokens'}.
+    """
+    query = truncate_to_tokens(user_query, int(max_tokens * CONTEXT_QUERY_SHARE), keep_end=True)
+    footer = f"\nUser Query: {query}\nAnswer:\n"
+    budget = max_tokens - approx_tokens(PROMPT_HEADER) - approx_tokens(footer)
+
+    lines, used, packed = [PROMPT_HEADER], [], []
+    for fact, _ in sorted(scored_facts, key=lambda x: x[1], reverse=True):
+        text = (fact.get("natural_text") or "").strip()
+        if not text:
+            continue
+        words = _words(text)
+        if _near_duplicate(words, packed, CONTEXT_DEDUP_JACCARD):
+            continue
+        suffix = f" (trust={effective_trust(fact):.2f})\n"
+        room = min(CONTEXT_FACT_MAX_TOKENS, budget - approx_tokens(suffix) - 1)
+        if room < CONTEXT_MIN_FACT_TOKENS:
+            break
+        line = f"- {truncate_to_tokens(text, room)}{suffix}"
+        budget -= approx_tokens(line)
+        lines.append(line)
+        used.append(fact)
+        packed.append(words)
+    lines.append(footer)
+
+    prompt = "".join(lines)
+    prompt_tokens = approx_tokens(prompt)
+    return {
+        "prompt": prompt,
+        "used_facts": used,
+        "prompt_tokens": prompt_tokens,
+        "max_tokens": max(1, min(ANSWER_MAX_TOKENS, VLLM_MAX_MODEL_LEN - prompt_tokens)),
+    }
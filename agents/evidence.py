@@ -0,0 +1,162 @@
+# agno_pipeline/agents/evidence.py
+import asyncio
+import datetime
+import hashlib
+import logging
+import re
+from typing import List, Dict, Any, Optional
+
+from agno_pipeline.config import (
+    SERPER_API_KEY,
+    SERPER_URL,
+    SERPER_TIMEOUT,
+    EVIDENCE_CACHE_TTL_SECONDS,
+    EVIDENCE_CACHE_SIZE,
+    EVIDENCE_CACHE_PERSIST,
+    EVIDENCE_CACHE_COLLECTION,
+)
+from agno_pipeline.db.mongo_client import mongo_client
+from agno_pipeline.models.http_client import get_http_client
+from agno_pipeline.models.embedding_cache import LRUStore
+from agno_pipeline.metrics import instrumented, count_cache
+
+logger = logging.getLogger("evidence_cache")
+logger.setLevel(logging.INFO)
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Case, punctuation and whitespace-insensitive form used as the cache key."""
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", query.lower())).strip()
+
+
+def evidence_key(query: str, top_n: int) -> str:
+    return hashlib.sha256(f"{normalize_query(query)}\x00{top_n}".encode("utf-8")).hexdigest()
+
+
+@instrumented("serper", "search")
+async def search_serper(query: str, top_n: int = 5) -> List[Dict[str, Any]]:
+    """
+    Use Serper.dev search (over the shared pooled client) to obtain snippets.
+    Returns list of {'snippet': str, 'link': str, 'title': str}
+    """
+    headers = {"X-API-KEY": SERPER_API_KEY, "Content-Type": "application/json"}
+    payload = {"q": query, "num": top_n}
+    resp = await get_http_client().post(SERPER_URL, headers=headers, json=payload, timeout=SERPER_TIMEOUT)
+    resp.raise_for_status()
+    data = resp.json()
+    snippets = []
+    # Serper's response shapes vary; try to extract organic results
+    organic = data.get("organic", [])
+    for item in organic[:top_n]:
+        snippets.append({
+            "snippet": item.get("snippet") or item.get("description") or "",
+            "link": item.get("link"),
+            "title": item.get("title")
+        })
+    return snippets
+
+
+class MongoEvidenceStore:
+    """Shared tier; a TTL index on expires_at lets Mongo drop stale entries."""
+
+    def __init__(self, collection_name: str = EVIDENCE_CACHE_COLLECTION):
+        self.collection_name = collection_name
+        self._indexed = False
+
+    @property
+    def collection(self):
+        return mongo_client.db[self.collection_name]
+
+    @instrumented("mongo", "evidence_cache_get")
+    async def get(self, key: str) -> Optional[list]:
+        doc = await self.collection.find_one(
+            {"_id": key, "expires_at": {"$gt": datetime.datetime.utcnow()}}, {"snippets": 1}
+        )
+        return doc["snippets"] if doc else None
+
+    @instrumented("mongo", "evidence_cache_put")
+    async def put(self, key: str, query: str, snippets: list, ttl: float):
+        if not self._indexed:
+            await self.collection.create_index("expires_at", expireAfterSeconds=0)
+            self._indexed = True
+        await self.collection.replace_one(
+            {"_id": key},
+            {
+                "_id": key,
+                "query": normalize_query(query),
+                "snippets": snippets,
+                "expires_at": datetime.datetime.utcnow() + datetime.timedelta(seconds=ttl),
+            },
+            upsert=True
+        )
+
+
+class EvidenceCache:
+    """
+    TTL cache for web evidence keyed by the normalized query.
+    Lookup order: in-memory LRU -> Mongo tier -> search. Concurrent misses for the
+    same key share one in-flight search (single-flight). Errors are never cached.
+    """
+
+    def __init__(self, search=search_serper, ttl: float = EVIDENCE_CACHE_TTL_SECONDS,
+                 max_items: int = EVIDENCE_CACHE_SIZE, persistent: MongoEvidenceStore = None):
+        self.search = search
+        self.ttl = ttl
+        self.persistent = persistent
+        self.lru = LRUStore(max_items, ttl=ttl)
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def get(self, query: str, top_n: int = 5) -> List[Dict[str, Any]]:
+        """Hits are counted wherever no search is spent: LRU, Mongo tier, or joining an in-flight load."""
+        key = evidence_key(query, top_n)
+        snippets = self.lru.get(key)
+        if snippets is not None:
+            count_cache("evidence", 1, 0)
+            return snippets
+
+        # the load runs as its own task so cancelling any caller (the first one included)
+        # neither aborts it for the others nor leaves them waiting on an unresolved future
+        task = self._inflight.get(key)
+        if task is not None:
+            count_cache("evidence", 1, 0)
+        else:
+            task = asyncio.get_running_loop().create_task(self._load(key, query, top_n))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._loaded(key, t))
+        return await asyncio.shield(task)
+
+    def _loaded(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved so a load nobody awaits anymore isn't logged
+
+    async def _load(self, key: str, query: str, top_n: int) -> list:
+        if self.persistent is not None:
+            try:
+                snippets = await self.persistent.get(key)
+            except Exception:
+                logger.exception("Evidence cache read failed")
+                snippets = None
+            if snippets is not None:
+                count_cache("evidence", 1, 0)
+                self.lru.put(key, snippets)
+                return snippets
+
+        count_cache("evidence", 0, 1)
+        snippets = await self.search(query, top_n)
+        self.lru.put(key, snippets)
+        if self.persistent is not None:
+            try:
+                await self.persistent.put(key, query, snippets, self.ttl)
+            except Exception:
+                logger.exception("Evidence cache write failed")
+        return snippets
+
+
+evidence_cache = EvidenceCache(
+    persistent=MongoEvidenceStore() if EVIDENCE_CACHE_PERSIST == "mongo" else None,
+)
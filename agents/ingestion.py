@@ -3,13 +3,27 @@ import asyncio
 import logging
 import time
 import uuid
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 
-from agno_pipeline.config import QDRANT_COLLECTION
+import numpy as np
+
+from agno_pipeline.config import (
+    QDRANT_COLLECTION,
+    QDRANT_VECTOR_DIM,
+    INGEST_EXTRACT_CONCURRENCY,
+    INGEST_BULK_CHUNK,
+    DEDUP_ENABLED,
+    DEDUP_SIMILARITY_THRESHOLD,
+    QUERY_SCOPE_TO_USER,
+)
+from agno_pipeline.agents.trust import refresh_expiry
 from agno_pipeline.db.mongo_client import mongo_client, mongo_sync_wrapper
 from agno_pipeline.db.qdrant_client import qdrant_client, qdrant_sync_wrapper
-from agno_pipeline.models.embedding import embedding_client
-from agno_pipeline.models.vllm_client import vllm_client
+from agno_pipeline.db.outbox import qdrant_outbox
+from agno_pipeline.db.vector_config import as_float32
+from agno_pipeline.models.embedding_cache import embedding_cache
+from agno_pipeline.models.vllm_client import async_vllm_client
+from agno_pipeline.metrics import timed_stage
 
 logger = logging.getLogger("ingestion_agent")
 logger.setLevel(logging.INFO)
@@ -21,77 +35,257 @@ def make_fact_id() -> str:
 
 async def async_extract_claims(text: str) -> List[Dict[str, Any]]:
     """
-    Call the (sync) vLLM client.extract_claims in a thread.
-    This keeps agent async-friendly while reusing your existing vllm client.
+    Call the native async vLLM client.
     """
-    return await asyncio.to_thread(vllm_client.extract_claims, text)
+    return await async_vllm_client.extract_claims(text)
 
 
-async def async_embed(text: str) -> List[float]:
+async def async_embed(text: str) -> np.ndarray:
     """
-    Call the (sync) embedding TEI client in a thread.
+    Embed through the content-addressed cache; misses go to the shared
+    micro-batcher so concurrent callers share one TEI request.
     """
-    return await asyncio.to_thread(embedding_client.embed, text)
+    return await embedding_cache.embed(text)
 
 
-async def async_upsert_qdrant(fact_id: str, vector: List[float], payload: Dict[str, Any]):
-    return await asyncio.to_thread(qdrant_client.upsert_fact, fact_id, vector, payload)
+async def async_upsert_qdrant(fact_id: str, vector: np.ndarray, payload: Dict[str, Any]):
+    await qdrant_outbox.upsert([(fact_id, vector, payload)])
 
 
 async def async_insert_mongo(fact_id: str, doc: Dict[str, Any]):
     await mongo_client.insert_or_update_fact(fact_id, doc)
 
 
-async def ingest_text(user_id: str, session_id: str, text: str, tools: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+def build_fact_doc(claim: Dict[str, Any], text: str, user_id: str, session_id: str, ts: float) -> Dict[str, Any]:
+    doc = {
+        'fact_id': make_fact_id(),
+        'natural_text': claim.get('natural_text', text),
+        'subject': claim.get('subject'),
+        'predicate': claim.get('predicate'),
+        'object': claim.get('object'),
+        'user_id': user_id,
+        'status': 'staging',
+        'trust': 0.1,
+        'confirmations': 1,
+        'sources': [{'type': 'chat', 'user_id': user_id, 'session_id': session_id, 'ts': ts}],
+        'first_seen': ts,
+        'last_checked': None,
+    }
+    return refresh_expiry(doc)
+
+
+async def persist_facts(docs: List[Dict[str, Any]], vectors: List[np.ndarray]) -> Dict[int, str]:
+    """
+    One Mongo bulk_write for many facts, then one outbox write queuing their Qdrant
+    points (only for docs Mongo accepted). Returns {index: error} for rejected docs.
+    """
+    if not docs:
+        return {}
+    errors = await mongo_client.bulk_upsert_facts(docs)
+    await qdrant_outbox.upsert([
+        (d['fact_id'], v, d) for k, (d, v) in enumerate(zip(docs, vectors)) if k not in errors
+    ])
+    return errors
+
+
+async def dedup_facts(docs: List[Dict[str, Any]], vectors: List[np.ndarray]) -> Dict[int, str]:
+    """
+    Find near-duplicates before inserting: {index: fact_id to merge into} for docs whose
+    vector is within DEDUP_SIMILARITY_THRESHOLD of a stored fact (in Qdrant or still queued
+    in the outbox) or of an earlier doc in the batch. Rejected and pruned facts are never
+    merge targets, and with QUERY_SCOPE_TO_USER neither are other users' facts.
+    """
+    if not DEDUP_ENABLED or not docs:
+        return {}
+    user_ids = [d['user_id'] for d in docs] if QUERY_SCOPE_TO_USER else None
+    try:
+        existing = await asyncio.to_thread(qdrant_client.find_nearest_ids, vectors, DEDUP_SIMILARITY_THRESHOLD, user_ids)
+    except Exception:
+        logger.exception("Duplicate search failed for %d facts; inserting all", len(docs))
+        existing = [None] * len(docs)
+    # points queued in the outbox are not searchable in Qdrant until the next flush
+    unmatched = [k for k, fid in enumerate(existing) if fid is None]
+    if unmatched:
+        try:
+            pending = await qdrant_outbox.nearest_pending(
+                [vectors[k] for k in unmatched], DEDUP_SIMILARITY_THRESHOLD,
+                [user_ids[k] for k in unmatched] if user_ids is not None else None
+            )
+        except Exception:
+            logger.exception("Pending duplicate search failed for %d facts", len(unmatched))
+            pending = [None] * len(unmatched)
+        for k, fid in zip(unmatched, pending):
+            existing[k] = fid
+    merges = {k: fid for k, fid in enumerate(existing) if fid is not None}
+
+    # Qdrant payloads can lag Mongo: only merge into facts that still exist and aren't rejected
+    if merges:
+        statuses = await mongo_client.get_fact_statuses(list(set(merges.values())))
+        merges = {k: fid for k, fid in merges.items() if statuses.get(fid, 'rejected') != 'rejected'}
+
+    mat = as_float32(np.stack(vectors))
+    norms = np.linalg.norm(mat, axis=1)
+    mat = mat / np.where(norms > 0, norms, 1.0)[:, None]
+    sims = mat @ mat.T
+    kept = []
+    for k in range(len(docs)):
+        if k in merges or norms[k] == 0:  # zero vectors are embedding fallbacks, never dedup them
+            continue
+        dup = next((j for j in kept if sims[k, j] >= DEDUP_SIMILARITY_THRESHOLD
+                    and (user_ids is None or user_ids[j] == user_ids[k])), None)
+        if dup is None:
+            kept.append(k)
+        else:
+            merges[k] = docs[dup]['fact_id']
+    return merges
+
+
+@timed_stage("ingest_store")
+async def store_facts(docs: List[Dict[str, Any]], vectors: List[np.ndarray]) -> Dict[int, Dict[str, Any]]:
+    """
+    Dedup, then persist. Duplicates add their sources to the matched fact and bump its
+    confirmations counter instead of creating a new point.
+    Returns {index: {fact_id, natural_text, merged}} or {index: {error}} per doc.
+    """
+    merges = await dedup_facts(docs, vectors)
+    index_of = {d['fact_id']: k for k, d in enumerate(docs)}
+    to_existing = []  # (doc index, stored fact_id)
+    for k, target in merges.items():
+        if target in index_of:
+            head = docs[index_of[target]]
+            head['sources'].extend(docs[k]['sources'])
+            head['confirmations'] += 1
+        else:
+            to_existing.append((k, target))
+
+    new = [k for k in range(len(docs)) if k not in merges]
+    write_errors = await persist_facts([docs[k] for k in new], [vectors[k] for k in new])
+    merge_errors = await mongo_client.merge_duplicate_facts([(fid, docs[k]['sources']) for k, fid in to_existing])
+
+    failed = {new[j]: err for j, err in write_errors.items()}
+    failed.update({to_existing[j][0]: err for j, err in merge_errors.items()})
+    outcomes = {}
+    for k, d in enumerate(docs):
+        target = merges.get(k)
+        if k in failed:
+            outcomes[k] = {'error': failed[k]}
+        elif target is not None and target in index_of and index_of[target] in failed:
+            outcomes[k] = {'error': failed[index_of[target]]}
+        else:
+            outcomes[k] = {'fact_id': target or d['fact_id'], 'natural_text': d['natural_text'],
+                           'merged': target is not None}
+    return outcomes
+
+
+async def extract_and_store(user_id: str, session_id: str, text: str
+                            ) -> Tuple[List[Dict[str, Any]], np.ndarray, Dict[int, Dict[str, Any]]]:
     """
-    Ingest text, extract claims, embed, persist to Qdrant+Mongo and return list of created facts.
+    Extract claims from text, embed them and store them (merging near-duplicates).
+    Raises if any fact could not be written.
 
-    Returns: { 'created': [ { fact_id, natural_text }, ... ] }
+    Returns: (docs, vectors, outcomes) with outcomes as returned by store_facts
     """
     ts = time.time()
-    created = []
+    claims = await async_extract_claims(text)
+    logger.info("Extracted %d claims from input", len(claims))
+    docs = [build_fact_doc(c, text, user_id, session_id, ts) for c in claims]
+    # embed all claims in one cache lookup + one TEI request for the misses
     try:
-        claims = await async_extract_claims(text)
-        logger.info("Extracted %d claims from input", len(claims))
-        for c in claims:
-            fact_id = make_fact_id()
-            natural_text = c.get('natural_text', text)
-            subject = c.get('subject')
-            predicate = c.get('predicate')
-            obj = c.get('object')
-
-            # embedding (call sync TEI embedding in thread)
-            try:
-                vec = await async_embed(natural_text)
-            except Exception as e:
-                logger.exception("Embedding failed for fact %s: %s", fact_id, e)
-                vec = [0.0] * 1536  # fallback (shouldn't happen in prod)
-
-            doc = {
-                'fact_id': fact_id,
-                'natural_text': natural_text,
-                'subject': subject,
-                'predicate': predicate,
-                'object': obj,
-                'status': 'staging',
-                'trust': 0.1,
-                'sources': [{'type': 'chat', 'user_id': user_id, 'session_id': session_id, 'ts': ts}],
-                'first_seen': ts,
-                'last_checked': None,
-            }
-
-            # persist: qdrant (sync client in thread) & mongo (async)
-            try:
-                await async_upsert_qdrant(fact_id, vec, doc)
-            except Exception:
-                # try again as best-effort -- log but continue
-                logger.exception("Qdrant upsert failed for %s", fact_id)
-
-            await async_insert_mongo(fact_id, doc)
-            created.append({'fact_id': fact_id, 'natural_text': natural_text})
+        vectors = await embedding_cache.embed_batch([d['natural_text'] for d in docs])
+    except Exception as e:
+        logger.exception("Embedding failed for %d claims: %s", len(docs), e)
+        vectors = np.zeros((len(docs), QDRANT_VECTOR_DIM), dtype=np.float32)  # fallback (shouldn't happen in prod)
+
+    outcomes = await store_facts(docs, vectors)
+    errors = [o['error'] for o in outcomes.values() if 'error' in o]
+    if errors:
+        raise RuntimeError(f"Mongo write failed for {len(errors)} facts: {errors[0]}")
+    return docs, vectors, outcomes
+
+
+@timed_stage("ingest")
+async def ingest_text(user_id: str, session_id: str, text: str, tools: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Ingest text, extract claims, embed, merge near-duplicates into existing facts,
+    persist new facts to Qdrant+Mongo and return the created and merged facts.
 
+    Returns: { 'created': [ { fact_id, natural_text }, ... ], 'merged': [ { fact_id, natural_text }, ... ] }
+    """
+    try:
+        docs, _, outcomes = await extract_and_store(user_id, session_id, text)
     except Exception as e:
         logger.exception("ingest_text failed: %s", e)
         raise
 
-    return {'created': created}
+    result = {'created': [], 'merged': []}
+    for k in range(len(docs)):
+        o = outcomes[k]
+        result['merged' if o['merged'] else 'created'].append({'fact_id': o['fact_id'], 'natural_text': o['natural_text']})
+    return result
+
+
+@timed_stage("ingest_bulk")
+async def ingest_texts(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Bulk ingestion: items are {user_id, session_id, text, tools?, timestamp?}.
+      - extract claims for all items concurrently (bounded)
+      - embed in batches, merge near-duplicates, one Qdrant upsert and one Mongo bulk_write per chunk
+      - per-item errors are reported; they never fail the batch
+
+    Returns: { 'results': [ {index, created, merged, error?}, ... ], 'created': n, 'merged': n, 'failed': n }
+    """
+    sem = asyncio.Semaphore(INGEST_EXTRACT_CONCURRENCY)
+
+    async def extract(item):
+        async with sem:
+            return await async_extract_claims(item['text'])
+
+    extracted = await asyncio.gather(*(extract(it) for it in items), return_exceptions=True)
+
+    errors: Dict[int, str] = {}
+    pending = []  # (item index, doc)
+    for i, (item, claims) in enumerate(zip(items, extracted)):
+        if isinstance(claims, Exception):
+            logger.error("Claim extraction failed for item %d: %s", i, claims)
+            errors[i] = f"extract_failed: {claims}"
+            continue
+        ts = item.get('timestamp') or time.time()
+        for c in claims:
+            pending.append((i, build_fact_doc(c, item['text'], item['user_id'], item['session_id'], ts)))
+
+    created: Dict[int, List[Dict[str, Any]]] = {}
+    merged: Dict[int, List[Dict[str, Any]]] = {}
+    for start in range(0, len(pending), INGEST_BULK_CHUNK):
+        chunk = pending[start:start + INGEST_BULK_CHUNK]
+        chunk = [(i, d) for i, d in chunk if i not in errors]
+        if not chunk:
+            continue
+        docs = [d for _, d in chunk]
+        try:
+            vectors = await embedding_cache.embed_batch([d['natural_text'] for d in docs])
+            outcomes = await store_facts(docs, vectors)
+        except Exception as e:
+            logger.exception("Bulk ingest chunk of %d facts failed", len(docs))
+            outcomes = {k: {'error': str(e)} for k in range(len(docs))}
+        for k, (i, d) in enumerate(chunk):
+            o = outcomes[k]
+            if 'error' in o:
+                errors.setdefault(i, f"write_failed: {o['error']}")
+            else:
+                (merged if o['merged'] else created).setdefault(i, []).append(
+                    {'fact_id': o['fact_id'], 'natural_text': o['natural_text']}
+                )
+
+    results = []
+    for i in range(len(items)):
+        result = {'index': i, 'created': created.get(i, []), 'merged': merged.get(i, [])}
+        if i in errors:
+            result['error'] = errors[i]
+        results.append(result)
+    logger.info("Bulk ingested %d items (%d failed)", len(items), len(errors))
+    return {
+        'results': results,
+        'created': sum(len(v) for v in created.values()),
+        'merged': sum(len(v) for v in merged.values()),
+        'failed': len(errors),
+    }
@@ -2,25 +2,46 @@ import asyncio
 import logging
 from agno_pipeline.db.mongo_client import mongo_client
 from agno_pipeline.db.qdrant_client import qdrant_client
-from agno_pipeline.models.embedding import embedding_client
+from agno_pipeline.db.outbox import qdrant_outbox
+from agno_pipeline.models.embedding_cache import embedding_cache
+from agno_pipeline.metrics import timed_stage
 
 logger = logging.getLogger("memory_agent")
 logger.setLevel(logging.INFO)
 
 
+@timed_stage("admit")
+async def admit_doc(doc: dict, vector=None) -> dict:
+    """
+    Sync an in-memory fact into Qdrant through the outbox. With a carried vector the full
+    point is queued; otherwise only the payload is, and the point is re-embedded only if
+    it is neither in Qdrant nor queued for upsert (or it is queued for deletion).
+    """
+    fact_id = doc["fact_id"]
+    if vector is not None:
+        await qdrant_outbox.upsert([(fact_id, vector, doc)])
+        return {"fact_id": fact_id, "status": doc.get("status")}
+    pending = await qdrant_outbox.pending_op(fact_id)
+    if pending == "upsert" or (
+        pending != "delete" and fact_id in await asyncio.to_thread(qdrant_client.existing_ids, [fact_id])
+    ):
+        await qdrant_outbox.set_payload({fact_id: doc})
+    else:
+        logger.info("Point %s missing from Qdrant, re-inserting", fact_id)
+        vec = await embedding_cache.embed(doc["natural_text"])
+        await qdrant_outbox.upsert([(fact_id, vec, doc)])
+    return {"fact_id": fact_id, "status": doc.get("status")}
+
+
 async def admit_fact(fact_id: str) -> dict:
     """
     Memory Agent:
       - Ensure fact is in production state
-      - Upsert into Qdrant (idempotent)
-      - Keep provenance in Mongo
+      - Sync its payload into Qdrant (vector is only re-embedded if the point is missing)
+      - Provenance stays in Mongo; nothing there changes, so nothing is rewritten
     """
     doc = await mongo_client.get_fact_by_id(fact_id)
     if not doc:
         logger.warning("Fact not found in memory agent: %s", fact_id)
         return {"fact_id": fact_id, "error": "not_found"}
-
-    vec = await asyncio.to_thread(embedding_client.embed, doc["natural_text"])
-    await asyncio.to_thread(qdrant_client.upsert_fact, fact_id, vec, doc)
-    await mongo_client.insert_or_update_fact(fact_id, doc)
-    return {"fact_id": fact_id, "status": doc.get("status")}
+    return await admit_doc(doc)
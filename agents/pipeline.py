@@ -0,0 +1,68 @@
+# agno_pipeline/agents/pipeline.py
+import asyncio
+import logging
+from typing import Dict, List, Any
+
+import numpy as np
+
+from agno_pipeline.config import FUSED_CONCURRENCY
+from agno_pipeline.agents.ingestion import extract_and_store
+from agno_pipeline.agents.verifications import verify_doc
+from agno_pipeline.agents.scoring import score_doc
+from agno_pipeline.agents.memory import admit_doc
+from agno_pipeline.agents.stage import commit_stage
+from agno_pipeline.metrics import timed_stage
+
+logger = logging.getLogger("pipeline_agent")
+logger.setLevel(logging.INFO)
+
+
+async def advance_fact(doc: Dict[str, Any], vector: np.ndarray) -> Dict[str, Any]:
+    """
+    Verify -> score -> admit one freshly stored fact, carrying the document and its
+    vector in memory. Each transition is one conditional write of the changed fields;
+    the run stops at the first stage whose write loses to another writer.
+    """
+    result = {'fact_id': doc['fact_id']}
+    changes = await verify_doc(doc)
+    if not await commit_stage(doc, changes):
+        return {**result, 'stopped_at': 'verify', 'status': changes['prev_status']}
+    result['verify'] = changes['result']
+
+    if doc['status'] != 'rejected':
+        changes = score_doc(doc)
+        if not await commit_stage(doc, changes):
+            return {**result, 'stopped_at': 'score', 'status': changes['prev_status']}
+        result['score'] = changes['result']
+
+    if doc['status'] == 'production':
+        result['admit'] = await admit_doc(doc, vector)
+    result['status'] = doc['status']
+    return result
+
+
+@timed_stage("fused_pipeline")
+async def run_fused_pipeline(user_id: str, session_id: str, text: str, tools: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Ingest text and take every newly created fact through verification, scoring and
+    admission in one task, without re-reading facts from Mongo between stages.
+    Claims merged into existing facts are not re-verified here.
+
+    Returns: { 'created': [ {fact_id, status, verify, score?, admit?}, ... ], 'merged': [ {fact_id, natural_text}, ... ] }
+    """
+    docs, vectors, outcomes = await extract_and_store(user_id, session_id, text)
+    sem = asyncio.Semaphore(FUSED_CONCURRENCY)
+
+    async def advance(k: int) -> Dict[str, Any]:
+        async with sem:
+            try:
+                return await advance_fact(docs[k], vectors[k])
+            except Exception as e:
+                logger.exception("Fused pipeline failed for %s", docs[k]['fact_id'])
+                return {'fact_id': docs[k]['fact_id'], 'error': str(e)}
+
+    created = [k for k, o in outcomes.items() if not o['merged']]
+    merged = [{'fact_id': o['fact_id'], 'natural_text': o['natural_text']} for o in outcomes.values() if o['merged']]
+    results = await asyncio.gather(*(advance(k) for k in created))
+    logger.info("Fused pipeline advanced %d facts (%d merged)", len(results), len(merged))
+    return {'created': list(results), 'merged': merged}
@@ -1,44 +1,51 @@
 import time
 import logging
-from agno_pipeline.config import DECAY_HALF_LIFE_SECONDS, PRUNE_THRESHOLD
-from agno_pipeline.db.mongo_client import mongo_client, mongo_sync_wrapper
-from agno_pipeline.db.qdrant_client import qdrant_client
+from agno_pipeline.config import PRUNE_BATCH_SIZE
+from agno_pipeline.db.mongo_client import mongo_client
+from agno_pipeline.db.outbox import qdrant_outbox
+from agno_pipeline.agents.answer_cache import answer_cache
+from agno_pipeline.agents.trust import compute_expires_at, trust_anchor
+from agno_pipeline.metrics import timed_stage
 
 logger = logging.getLogger("pruning_agent")
 logger.setLevel(logging.INFO)
 
 
-def decay_trust(initial_trust: float, age_seconds: float) -> float:
-    """Exponential decay formula."""
-    half = DECAY_HALF_LIFE_SECONDS
-    decay = 0.5 ** (age_seconds / half)
-    return initial_trust * decay
+async def backfill_expiry(batch_size: int = PRUNE_BATCH_SIZE) -> int:
+    """Set expires_at on facts written before it existed."""
+    total = 0
+    while True:
+        facts = await mongo_client.find_facts_without_expiry(batch_size)
+        if not facts:
+            return total
+        await mongo_client.set_fields_many({
+            f["fact_id"]: {"expires_at": compute_expires_at(f.get("trust", 0) or 0, trust_anchor(f))}
+            for f in facts
+        })
+        total += len(facts)
 
 
+@timed_stage("prune")
 async def prune_facts() -> dict:
     """
     Pruning Agent:
-      - Decay trust based on last_checked/first_seen
-      - Remove from DBs if trust < threshold
+      - Every fact carries expires_at (when its decayed trust crosses PRUNE_THRESHOLD)
+      - Remove expired facts with an indexed range query and batched deletes
     """
     now = time.time()
-    facts = await mongo_client.get_all_facts()
+    await backfill_expiry()
     pruned_ids = []
 
-    for fact in facts:
-        last_seen = fact.get("last_checked") or fact.get("first_seen") or now
-        age = now - last_seen
-        new_trust = decay_trust(fact.get("trust", 0), age)
-        fact["trust"] = new_trust
-
-        if new_trust < PRUNE_THRESHOLD:
-            pruned_ids.append(fact["fact_id"])
-            await mongo_client.delete_fact(fact["fact_id"])
-            try:
-                qdrant_client.delete_by_filter({"must": [{"key": "fact_id", "match": {"value": fact["fact_id"]}}]})
-            except Exception:
-                logger.exception("Failed to delete fact from Qdrant: %s", fact["fact_id"])
-        else:
-            await mongo_client.insert_or_update_fact(fact["fact_id"], fact)
+    while True:
+        ids = await mongo_client.find_expired_fact_ids(now, PRUNE_BATCH_SIZE)
+        if not ids:
+            break
+        # queue the point deletes first: if the Mongo delete then fails, the facts are
+        # found again on the next run and the (idempotent) deletes are re-queued
+        await qdrant_outbox.delete(ids)
+        await mongo_client.delete_facts(ids)
+        if answer_cache is not None:
+            await answer_cache.invalidate_facts(ids)
+        pruned_ids.extend(ids)
 
     return {"pruned": len(pruned_ids), "ids": pruned_ids}
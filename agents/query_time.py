@@ -1,46 +1,127 @@
 import asyncio
 import logging
-from typing import List, Dict
+from typing import List, Dict, Any, AsyncIterator
+from agno_pipeline.config import QUERY_STATUSES, QUERY_MIN_TRUST, QUERY_SCOPE_TO_USER
 from agno_pipeline.db.qdrant_client import qdrant_client
-from agno_pipeline.models.embedding import embedding_client
-from agno_pipeline.models.reranker import reranker_client
-from agno_pipeline.models.vllm_client import vllm_client
+from agno_pipeline.agents.context import build_context
+from agno_pipeline.agents.answer_cache import answer_cache
+from agno_pipeline.models.embedding_cache import embedding_cache
+from agno_pipeline.models.reranker import async_reranker_client
+from agno_pipeline.models.vllm_client import async_vllm_client
+from agno_pipeline.metrics import timed_stage
 
 logger = logging.getLogger("query_time_agent")
 logger.setLevel(logging.INFO)
 
+# Only what reranking, the prompt and the answer cache need.
+QUERY_PAYLOAD_FIELDS = ["fact_id", "natural_text", "trust", "status", "last_checked", "first_seen"]
 
-async def retrieve_and_answer(user_query: str, top_k: int = 8) -> dict:
+
+@timed_stage("query_prepare")
+async def prepare_answer(user_query: str, top_k: int = 8, user_id: str = None) -> Dict[str, Any]:
     """
-    Query-Time Agent:
+    Everything before generation:
       - Embed the query
-      - Retrieve top_k from Qdrant
+      - Serve a semantically equivalent cached answer if one is still valid
+      - Retrieve top_k from Qdrant (filtered server-side by status/trust, optionally per user)
       - Rerank
-      - Build prompt for LLM
-      - Generate answer
+      - Pack the best facts into a token-budgeted prompt (build_context)
+    Returns {'vec', 'cache_scope', 'cached'} plus {'top_facts', 'prompt', 'max_tokens'} on a cache miss;
+    top_facts are the facts that made it into the prompt.
     """
-    vec = await asyncio.to_thread(embedding_client.embed, user_query)
-    hits = await asyncio.to_thread(qdrant_client.query_vector, vec, top_k)
+    vec = await embedding_cache.embed(user_query)
+    user_scope = user_id if QUERY_SCOPE_TO_USER else None
+    cache_scope = {"top_k": top_k}
+    if user_scope is not None:
+        cache_scope["user_id"] = user_scope
+    if answer_cache is not None:
+        cached = await answer_cache.lookup(vec, cache_scope)
+        if cached is not None:
+            return {"vec": vec, "cache_scope": cache_scope, "cached": cached}
+
+    hits = await asyncio.to_thread(
+        qdrant_client.search_facts, vec, top_k,
+        status=QUERY_STATUSES or None,
+        min_trust=QUERY_MIN_TRUST or None,
+        user_id=user_scope,
+        payload_fields=QUERY_PAYLOAD_FIELDS,
+    )
     facts = [h.payload for h in hits if hasattr(h, "payload")]
 
     # Rerank facts with query
-    reranked = []
-    for f in facts:
-        try:
-            score = await asyncio.to_thread(reranker_client.score, user_query, f.get("natural_text", ""))
-        except Exception:
-            score = 0.0
-        if score > 0:
-            reranked.append((f, score))
+    try:
+        scores = await async_reranker_client.score_many(
+            user_query, [f.get("natural_text", "") for f in facts]
+        )
+    except Exception:
+        logger.exception("Reranker failed for query")
+        scores = [0.0] * len(facts)
+    reranked = [(f, score) for f, score in zip(facts, scores) if score > 0]
 
     reranked.sort(key=lambda x: x[1], reverse=True)
-    top_facts = [f for f, _ in reranked[:top_k]]
+    context = build_context(user_query, reranked[:top_k])
+
+    return {"vec": vec, "cache_scope": cache_scope, "cached": None, "top_facts": context["used_facts"],
+            "prompt": context["prompt"], "max_tokens": context["max_tokens"]}
 
-    # Build LLM prompt
-    prompt = "Use the following facts to answer the query:\n"
-    for f in top_facts:
-        prompt += f"- {f.get('natural_text')} (trust={f.get('trust')})\n"
-    prompt += f"\nUser Query: {user_query}\nAnswer:\n"
 
-    answer = await asyncio.to_thread(vllm_client.generate, prompt)
+@timed_stage("query")
+async def retrieve_and_answer(user_query: str, top_k: int = 8, user_id: str = None) -> dict:
+    """
+    Query-Time Agent: prepare_answer() then generate the full answer.
+    """
+    prep = await prepare_answer(user_query, top_k, user_id)
+    if prep["cached"] is not None:
+        return prep["cached"]
+
+    top_facts = prep["top_facts"]
+    answer = await async_vllm_client.generate(prep["prompt"], prep["max_tokens"])
+    if answer_cache is not None:
+        await answer_cache.store(prep["vec"], prep["cache_scope"], answer, top_facts)
     return {"answer": answer, "used_facts": [f.get("fact_id") for f in top_facts]}
+
+
+async def stream_answer(user_query: str, top_k: int = 8, user_id: str = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming Query-Time Agent: prepare_answer() then stream_prepared().
+    Callers that must report preparation failures before streaming (the API, which
+    sends 200 headers with the first event) await prepare_answer() themselves.
+    """
+    prep = await prepare_answer(user_query, top_k, user_id)
+    async for event in stream_prepared(prep):
+        yield event
+
+
+@timed_stage("query_stream")
+async def stream_prepared(prep: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream the answer for a prepare_answer() result. Yields events:
+      {'type': 'used_facts', 'used_facts': [...]}
+      {'type': 'token', 'text': str}               for each generated delta
+      {'type': 'done'} or {'type': 'error', 'error': str}
+    """
+    if prep["cached"] is not None:
+        yield {"type": "used_facts", "used_facts": prep["cached"]["used_facts"]}
+        yield {"type": "token", "text": prep["cached"]["answer"]}
+        yield {"type": "done", "cached": True}
+        return
+
+    top_facts = prep["top_facts"]
+    yield {"type": "used_facts", "used_facts": [f.get("fact_id") for f in top_facts]}
+
+    parts: List[str] = []
+    try:
+        async for delta in async_vllm_client.generate_stream(prep["prompt"], prep["max_tokens"]):
+            parts.append(delta)
+            yield {"type": "token", "text": delta}
+    except Exception as e:
+        logger.exception("Streaming generation failed")
+        yield {"type": "error", "error": str(e)}
+        return
+
+    if answer_cache is not None:
+        try:
+            await answer_cache.store(prep["vec"], prep["cache_scope"], "".join(parts), top_facts)
+        except Exception:
+            logger.exception("Answer cache store failed")
+    yield {"type": "done", "cached": False}
@@ -1,38 +1,58 @@
-import asyncio
 import logging
 import time
 from agno_pipeline.config import STAGING_CONFIRM_K, VERIFY_LOW_THRESHOLD
 from agno_pipeline.db.mongo_client import mongo_client
-from agno_pipeline.db.qdrant_client import qdrant_client
-from agno_pipeline.models.embedding import embedding_client
+from agno_pipeline.agents.stage import stage_changes, commit_stage
+from agno_pipeline.agents.trust import effective_trust, compute_expires_at
+from agno_pipeline.metrics import timed_stage
 
 logger = logging.getLogger("scoring_agent")
 logger.setLevel(logging.INFO)
 
 
-async def score_fact(fact_id: str) -> dict:
+@timed_stage("score")
+def score_doc(doc: dict, now: float = None) -> dict:
     """
-    Scoring & Trust Agent:
-      - Check for multiple confirmations (placeholder logic for now)
+    Scoring & Trust Agent on an in-memory fact:
+      - Check for multiple confirmations (counter maintained by ingestion dedup)
       - If confirmed, promote to production and boost trust
+    Returns the stage changes for commit_stage, plus 'result'.
+    """
+    now = time.time() if now is None else now
+    confirmations = doc.get("confirmations", 1)
+    trust = effective_trust(doc, now)
+
+    if confirmations >= STAGING_CONFIRM_K and trust >= VERIFY_LOW_THRESHOLD:
+        trust = min(1.0, trust + 0.05)
+        changes = stage_changes(doc, {
+            "status": "production",
+            "trust": trust,
+            "last_checked": now,
+            "expires_at": compute_expires_at(trust, now),
+        })
+        changes["result"] = {"fact_id": doc["fact_id"], "admitted": True}
+        return changes
+
+    # re-anchor the decayed trust at this check
+    changes = stage_changes(doc, {
+        "trust": trust,
+        "last_checked": now,
+        "expires_at": compute_expires_at(trust, now),
+    })
+    changes["result"] = {"fact_id": doc["fact_id"], "admitted": False}
+    return changes
+
+
+async def score_fact(fact_id: str) -> dict:
+    """
+    Load a fact, score it and write only the changed fields back.
     """
     doc = await mongo_client.get_fact_by_id(fact_id)
     if not doc:
         logger.warning("Fact not found in scoring: %s", fact_id)
         return {"fact_id": fact_id, "error": "not_found"}
 
-    confirmations = 2  # TODO: Implement real check across Qdrant or Mongo
-    now = time.time()
-
-    if confirmations >= STAGING_CONFIRM_K and doc["trust"] >= VERIFY_LOW_THRESHOLD:
-        doc["status"] = "production"
-        doc["trust"] = min(1.0, doc["trust"] + 0.05)
-        vec = await asyncio.to_thread(embedding_client.embed, doc["natural_text"])
-        await asyncio.to_thread(qdrant_client.upsert_fact, fact_id, vec, doc)
-        doc["last_checked"] = now
-        await mongo_client.insert_or_update_fact(fact_id, doc)
-        return {"fact_id": fact_id, "admitted": True}
-
-    doc["last_checked"] = now
-    await mongo_client.insert_or_update_fact(fact_id, doc)
-    return {"fact_id": fact_id, "admitted": False}
+    changes = score_doc(doc)
+    if not await commit_stage(doc, changes):
+        return {"fact_id": fact_id, "error": "conflict"}
+    return changes["result"]
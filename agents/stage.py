@@ -0,0 +1,49 @@
+# agno_pipeline/agents/stage.py
+import logging
+from typing import Dict, Any, List
+
+from agno_pipeline.db.mongo_client import mongo_client
+from agno_pipeline.db.outbox import qdrant_outbox
+from agno_pipeline.agents.answer_cache import answer_cache
+from agno_pipeline.metrics import timed_stage
+
+logger = logging.getLogger("stage_commit")
+logger.setLevel(logging.INFO)
+
+
+def stage_changes(doc: Dict[str, Any], fields: Dict[str, Any], push_sources: List[dict] = None) -> Dict[str, Any]:
+    """
+    Apply a stage's field changes to the in-memory fact and record them for commit_stage.
+    Returns {'set': fields, 'push': sources, 'prev_status': status before the stage}.
+    """
+    prev_status = doc.get('status')
+    doc.update(fields)
+    if push_sources:
+        doc.setdefault('sources', []).extend(push_sources)
+    return {'set': dict(fields), 'push': list(push_sources or []), 'prev_status': prev_status}
+
+
+@timed_stage("stage_commit")
+async def commit_stage(doc: Dict[str, Any], changes: Dict[str, Any], conditional: bool = True) -> bool:
+    """
+    Persist one stage transition:
+      - one Mongo update of the changed fields only ($set, $push for new sources),
+        conditional on the fact still being in the status the stage started from
+      - the same fields queued as a payload-only Qdrant update (vector untouched)
+      - answer-cache invalidation when the status changed
+    Returns False, writing nothing, when another writer moved the fact first.
+    """
+    fact_id = doc['fact_id']
+    update = {'$set': changes['set']}
+    if changes['push']:
+        update['$push'] = {'sources': {'$each': changes['push']}}
+    expected = changes['prev_status'] if conditional else None
+    if not await mongo_client.update_fact_fields(fact_id, update, expected):
+        logger.warning("Stage commit skipped for %s: no longer in status %s", fact_id, expected)
+        return False
+
+    await qdrant_outbox.set_payload({fact_id: changes['set']})
+
+    if doc.get('status') != changes['prev_status'] and answer_cache is not None:
+        await answer_cache.invalidate_facts([fact_id])
+    return True
@@ -0,0 +1,35 @@
+# agno_pipeline/agents/trust.py
+import math
+import time
+from agno_pipeline.config import DECAY_HALF_LIFE_SECONDS, PRUNE_THRESHOLD
+
+
+def decay_trust(initial_trust: float, age_seconds: float) -> float:
+    """Exponential decay formula."""
+    half = DECAY_HALF_LIFE_SECONDS
+    decay = 0.5 ** (age_seconds / half)
+    return initial_trust * decay
+
+
+def trust_anchor(doc: dict, now: float = None) -> float:
+    """Time the stored trust was last set; decay is measured from here."""
+    return doc.get("last_checked") or doc.get("first_seen") or (now if now is not None else time.time())
+
+
+def effective_trust(doc: dict, now: float = None) -> float:
+    """Decayed trust, computed on read. The stored `trust` is the value at trust_anchor()."""
+    now = time.time() if now is None else now
+    return decay_trust(doc.get("trust", 0) or 0, max(0.0, now - trust_anchor(doc, now)))
+
+
+def compute_expires_at(trust: float, anchor: float) -> float:
+    """Moment decayed trust crosses PRUNE_THRESHOLD (the anchor itself if already below)."""
+    if trust <= PRUNE_THRESHOLD or PRUNE_THRESHOLD <= 0:
+        return anchor if PRUNE_THRESHOLD > 0 else math.inf
+    return anchor + DECAY_HALF_LIFE_SECONDS * math.log2(trust / PRUNE_THRESHOLD)
+
+
+def refresh_expiry(doc: dict) -> dict:
+    """Recompute `expires_at`; call whenever trust or last_checked changes."""
+    doc["expires_at"] = compute_expires_at(doc.get("trust", 0) or 0, trust_anchor(doc))
+    return doc
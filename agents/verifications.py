@@ -1,21 +1,22 @@
-# agno_pipeline/agents/verification.py
+# agno_pipeline/agents/verifications.py
 import asyncio
 import logging
 import time
 from typing import List, Dict, Any
-import httpx
 
 from agno_pipeline.config import (
-    SERPER_API_KEY,
     VERIFY_HIGH_THRESHOLD,
     VERIFY_LOW_THRESHOLD,
     RERANK_THRESH,
+    VERIFY_EARLY_EXIT,
 )
 from agno_pipeline.db.mongo_client import mongo_client
-from agno_pipeline.db.qdrant_client import qdrant_client
-from agno_pipeline.models.reranker import reranker_client
-from agno_pipeline.models.embedding import embedding_client
-from agno_pipeline.models.vllm_client import vllm_client
+from agno_pipeline.agents.trust import effective_trust, compute_expires_at
+from agno_pipeline.agents.evidence import evidence_cache
+from agno_pipeline.agents.stage import stage_changes, commit_stage
+from agno_pipeline.models.reranker import async_reranker_client
+from agno_pipeline.models.vllm_client import entailment_batcher
+from agno_pipeline.metrics import timed_stage
 
 logger = logging.getLogger("verification_agent")
 logger.setLevel(logging.INFO)
@@ -23,26 +24,10 @@ logger.setLevel(logging.INFO)
 
 async def fetch_serper_snippets(query: str, top_n: int = 5) -> List[Dict[str, Any]]:
     """
-    Use Serper.dev search to obtain snippets.
+    Web snippets for a claim, served from the evidence cache when possible.
     Returns list of {'snippet': str, 'link': str, 'title': str}
     """
-    headers = {"X-API-KEY": SERPER_API_KEY, "Content-Type": "application/json"}
-    payload = {"q": query, "num": top_n}
-    url = "https://google.serper.dev/search"
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        resp = await client.post(url, headers=headers, json=payload)
-        resp.raise_for_status()
-        data = resp.json()
-    snippets = []
-    # Serper's response shapes vary; try to extract organic results
-    organic = data.get("organic", [])
-    for item in organic[:top_n]:
-        snippets.append({
-            "snippet": item.get("snippet") or item.get("description") or "",
-            "link": item.get("link"),
-            "title": item.get("title")
-        })
-    return snippets
+    return await evidence_cache.get(query, top_n)
 
 
 def compute_verification_score(max_rerank: float, consensus_frac: float, entail_prob: float, source_rel: float) -> float:
@@ -50,54 +35,32 @@ def compute_verification_score(max_rerank: float, consensus_frac: float, entail_
     return w1 * max_rerank + w2 * consensus_frac + w3 * entail_prob + w4 * source_rel
 
 
-async def async_rerank_score(query: str, snippet: str) -> float:
+async def async_rerank_scores(query: str, snippets: List[str]) -> List[float]:
     """
-    Reranker client is sync; run in a thread.
+    Rerank all snippets against the query in one reranker call.
     """
-    return await asyncio.to_thread(reranker_client.score, query, snippet)
+    return await async_reranker_client.score_many(query, snippets)
 
 
-async def async_entailment_prob(claim: str, snippet: str) -> float:
+async def async_entailment_probs(claim: str, snippets: List[str]) -> List[float]:
     """
-    Use vLLM to estimate entailment probability via a prompt.
-    The vllm_client.generate is sync in current code, so execute in a thread.
-    Returns a float in [0,1].
+    P(snippet entails claim) in [0,1] for each snippet, read from the logprobs of a
+    one-token Yes/No answer; batched with any other facts being verified.
     """
-    prompt = (
-        "Rate how strongly the following snippet supports the claim on a scale 0.0-1.0.\n\n"
-        f"Claim: {claim}\n\nSnippet: {snippet}\n\n"
-        "Answer with a single number between 0.0 and 1.0 (e.g., 0.75)."
-    )
-    try:
-        resp_text = await asyncio.to_thread(vllm_client.generate, prompt, 32)
-        # try to extract a float
-        for token in resp_text.split():
-            try:
-                v = float(token.strip().strip('.,'))  # simple parse
-                # clamp
-                return max(0.0, min(1.0, v))
-            except Exception:
-                continue
-    except Exception:
-        logger.exception("Entailment call failed")
-    # fallback
-    return 0.5
+    return await entailment_batcher.score_many(claim, snippets)
 
 
-async def verify_fact(fact_id: str) -> Dict[str, Any]:
+@timed_stage("verify")
+async def verify_doc(doc: Dict[str, Any], now: float = None) -> Dict[str, Any]:
     """
-    Verification flow:
-      - fetch fact from Mongo
+    Verify an in-memory fact:
       - search web via Serper
       - rerank snippets and compute entailment
-      - compute verification score and update Mongo + Qdrant
+      - compute verification score and apply it to doc
+    Returns the stage changes for commit_stage, plus 'result'.
     """
-    now = time.time()
-    doc = await mongo_client.get_fact_by_id(fact_id)
-    if not doc:
-        logger.warning("verify_fact: fact not found %s", fact_id)
-        return {"fact_id": fact_id, "error": "not_found"}
-
+    now = time.time() if now is None else now
+    fact_id = doc['fact_id']
     claim_text = doc.get("natural_text")
 
     # fetch web snippets
@@ -108,31 +71,41 @@ async def verify_fact(fact_id: str) -> Dict[str, Any]:
         snippets = []
 
     if not snippets:
-        # minimal update: set last_checked and leave staging
-        doc['last_checked'] = now
-        await mongo_client.insert_or_update_fact(fact_id, doc)
-        return {"fact_id": fact_id, "score": 0.0, "status": doc.get('status')}
+        # minimal update: re-anchor trust at this check and leave the status alone
+        trust = effective_trust(doc, now)
+        changes = stage_changes(doc, {
+            'trust': trust,
+            'last_checked': now,
+            'expires_at': compute_expires_at(trust, now),
+        })
+        changes['result'] = {"fact_id": fact_id, "score": 0.0, "status": doc.get('status')}
+        return changes
 
-    rerank_scores = []
-    entail_probs = []
-    domains = set()
-    # iterate snippets
-    for s in snippets:
-        snippet_text = s.get("snippet", "")
-        # rerank (sync TEI client) in thread
+    snippet_texts = [s.get("snippet", "") for s in snippets]
+
+    async def rerank_all() -> List[float]:
         try:
-            rscore = await async_rerank_score(claim_text, snippet_text)
+            return await async_rerank_scores(claim_text, snippet_texts)
         except Exception:
             logger.exception("Reranker failed for %s", fact_id)
-            rscore = 0.0
-        rerank_scores.append(rscore)
-        # entailment via vLLM
+            return [0.0] * len(snippet_texts)
+
+    async def entail_all(texts: List[str]) -> List[float]:
         try:
-            ep = await async_entailment_prob(claim_text, snippet_text)
+            return await async_entailment_probs(claim_text, texts)
         except Exception:
             logger.exception("Entailment failed for %s", fact_id)
-            ep = 0.0
-        entail_probs.append(ep)
+            return [0.0] * len(texts)
+
+    # one reranker call and one (shared, batched) entailment call per fact
+    if VERIFY_EARLY_EXIT:
+        rerank_scores = await rerank_all()
+        entail_probs = await entail_all([t for t, r in zip(snippet_texts, rerank_scores) if r >= RERANK_THRESH])
+    else:
+        rerank_scores, entail_probs = await asyncio.gather(rerank_all(), entail_all(snippet_texts))
+
+    domains = set()
+    for s in snippets:
         link = s.get("link")
         if link:
             domains.add(link.split("/")[2] if "/" in link else link)
@@ -142,30 +115,40 @@ async def verify_fact(fact_id: str) -> Dict[str, Any]:
     entail_prob = max(entail_probs) if entail_probs else 0.0
     source_reliability = 0.6  # TODO: compute via domain reputation service
 
-    score = compute_verification_score(max_rerank, consensus_frac, entail_prob, source_reliability)
-    # update doc
-    doc['last_checked'] = now
-    doc['last_verification_score'] = float(score)
-    doc.setdefault('sources', []).append({'type': 'web_check', 'score': float(score), 'ts': now, 'n_snippets': len(snippets)})
+    score = float(compute_verification_score(max_rerank, consensus_frac, entail_prob, source_reliability))
 
     # thresholding
     if score >= VERIFY_HIGH_THRESHOLD:
-        doc['status'] = 'production'
-        doc['trust'] = float(score)
-        # recompute embedding and upsert to qdrant to ensure production vector is fresh
-        try:
-            vec = await asyncio.to_thread(embedding_client.embed, claim_text)
-            await asyncio.to_thread(qdrant_client.upsert_fact, fact_id, vec, doc)
-        except Exception:
-            logger.exception("Failed to upsert to qdrant during verification for %s", fact_id)
+        status = 'production'
     elif score > VERIFY_LOW_THRESHOLD:
-        doc['status'] = 'staging'
-        doc['trust'] = float(score)
+        status = 'staging'
     else:
-        doc['status'] = 'rejected'
-        doc['trust'] = float(score)
+        status = 'rejected'
+
+    changes = stage_changes(doc, {
+        'status': status,
+        'trust': score,
+        'last_checked': now,
+        'last_verification_score': score,
+        'expires_at': compute_expires_at(score, now),
+    }, push_sources=[{'type': 'web_check', 'score': score, 'ts': now, 'n_snippets': len(snippets)}])
+    changes['result'] = {"fact_id": fact_id, "score": score, "status": status}
+    return changes
 
-    # persist to mongo
-    await mongo_client.insert_or_update_fact(fact_id, doc)
 
-    return {"fact_id": fact_id, "score": float(score), "status": doc['status']}
+async def verify_fact(fact_id: str) -> Dict[str, Any]:
+    """
+    Verification flow:
+      - fetch fact from Mongo
+      - verify it (verify_doc)
+      - write only the changed fields to Mongo + Qdrant, if the status did not move meanwhile
+    """
+    doc = await mongo_client.get_fact_by_id(fact_id)
+    if not doc:
+        logger.warning("verify_fact: fact not found %s", fact_id)
+        return {"fact_id": fact_id, "error": "not_found"}
+
+    changes = await verify_doc(doc)
+    if not await commit_stage(doc, changes):
+        return {"fact_id": fact_id, "error": "conflict"}
+    return changes['result']
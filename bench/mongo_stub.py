@@ -0,0 +1,331 @@
+# agno_pipeline/bench/mongo_stub.py
+"""
+In-process stand-in for the Motor client, covering the operations the pipeline uses
+(filters with $in/$lte/$gt/$exists, $set/$push/$setOnInsert and the small pipeline-update
+subset used by merge_duplicate_facts, bulk_write, counts, indexes). An optional per-call
+latency approximates a network round trip. Benchmarks only; not a general Mongo emulator.
+"""
+import asyncio
+import copy
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from bson import ObjectId
+from pymongo import DeleteOne, UpdateOne, ReplaceOne
+
+
+def _get(doc: dict, key: str):
+    for part in key.split("."):
+        if not isinstance(doc, dict) or part not in doc:
+            return _MISSING
+        doc = doc[part]
+    return doc
+
+
+_MISSING = object()
+
+
+def _set_path(doc: dict, key: str, value):
+    *parents, leaf = key.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[leaf] = value
+
+
+def _unset_path(doc: dict, key: str):
+    *parents, leaf = key.split(".")
+    for part in parents:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(leaf, None)
+
+_OPS = {
+    "$in": lambda v, arg: v in arg,
+    "$nin": lambda v, arg: v not in arg,
+    "$ne": lambda v, arg: v != arg,
+    "$lt": lambda v, arg: v is not None and v < arg,
+    "$lte": lambda v, arg: v is not None and v <= arg,
+    "$gt": lambda v, arg: v is not None and v > arg,
+    "$gte": lambda v, arg: v is not None and v >= arg,
+}
+
+
+def matches(doc: dict, query: dict) -> bool:
+    for key, cond in query.items():
+        value = _get(doc, key)
+        if isinstance(cond, dict) and cond and all(k.startswith("$") for k in cond):
+            for op, arg in cond.items():
+                if op == "$exists":
+                    if (value is not _MISSING) != bool(arg):
+                        return False
+                elif value is _MISSING or not _OPS[op](value, arg):
+                    return False
+        elif value is _MISSING or value != cond:
+            return False
+    return True
+
+
+def _eval(expr, doc: dict):
+    """Aggregation expressions used by pipeline updates: $field, $literal, $ifNull, $concatArrays, $add."""
+    if isinstance(expr, str) and expr.startswith("$"):
+        value = _get(doc, expr[1:])
+        return None if value is _MISSING else value
+    if isinstance(expr, dict) and len(expr) == 1:
+        op, args = next(iter(expr.items()))
+        if op == "$literal":
+            return args
+        if op == "$ifNull":
+            value = _eval(args[0], doc)
+            return _eval(args[1], doc) if value is None else value
+        if op == "$concatArrays":
+            return [x for a in args for x in (_eval(a, doc) or [])]
+        if op == "$add":
+            return sum(_eval(a, doc) for a in args)
+    if isinstance(expr, list):
+        return [_eval(e, doc) for e in expr]
+    return expr
+
+
+def _apply_update(doc: dict, update, inserting: bool):
+    if isinstance(update, list):
+        for stage in update:
+            (op, fields), = stage.items()
+            if op not in ("$set", "$addFields"):
+                raise NotImplementedError(op)
+            values = {k: _eval(v, doc) for k, v in fields.items()}
+            doc.update(values)
+        return
+    for op, fields in update.items():
+        if op == "$set" or (op == "$setOnInsert" and inserting):
+            for k, v in fields.items():
+                _set_path(doc, k, copy.deepcopy(v))
+        elif op == "$setOnInsert":
+            continue
+        elif op == "$inc":
+            for k, v in fields.items():
+                doc[k] = doc.get(k, 0) + v
+        elif op == "$push":
+            for k, v in fields.items():
+                items = v["$each"] if isinstance(v, dict) and "$each" in v else [v]
+                doc.setdefault(k, []).extend(copy.deepcopy(items))
+        elif op == "$unset":
+            for k in fields:
+                _unset_path(doc, k)
+        else:
+            raise NotImplementedError(op)
+
+
+def _project(doc: dict, projection) -> dict:
+    if not projection:
+        return copy.deepcopy(doc)
+    include = [k for k, v in projection.items() if v and k != "_id"]
+    if include:
+        out = {}
+        for key in include:  # dotted paths keep just that sub-field
+            value = _get(doc, key)
+            if value is not _MISSING:
+                _set_path(out, key, copy.deepcopy(value))
+    else:
+        out = copy.deepcopy(doc)
+    if projection.get("_id", 1) and "_id" in doc:
+        out["_id"] = doc["_id"]
+    else:
+        out.pop("_id", None)
+    return out
+
+
+class InMemoryCursor:
+    def __init__(self, collection: "InMemoryCollection", query: dict, projection):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._limit = 0
+        self._sort = None
+
+    def limit(self, n: int) -> "InMemoryCursor":
+        self._limit = n
+        return self
+
+    def sort(self, key: str, direction: int = 1) -> "InMemoryCursor":
+        self._sort = (key, direction)
+        return self
+
+    async def _results(self) -> List[dict]:
+        await self._collection._delay()
+        docs = [d for d in self._collection._docs.values() if matches(d, self._query)]
+        if self._sort is not None:
+            key, direction = self._sort
+            docs.sort(key=lambda d: d.get(key, 0), reverse=direction < 0)
+        if self._limit:
+            docs = docs[:self._limit]
+        return [_project(d, self._projection) for d in docs]
+
+    async def to_list(self, length=None) -> List[dict]:
+        docs = await self._results()
+        return docs if length is None else docs[:length]
+
+    def __aiter__(self):
+        async def gen():
+            for d in await self._results():
+                yield d
+        return gen()
+
+
+class InMemoryCollection:
+    def __init__(self, name: str, latency: float = 0.0):
+        self.name = name
+        self.latency = latency
+        self._docs: Dict[Any, dict] = {}
+        self._indexes: Dict[str, dict] = {"_id_": {"key": [("_id", 1)]}}
+
+    async def _delay(self):
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        else:
+            await asyncio.sleep(0)
+
+    def _find_first(self, query: dict):
+        if set(query) == {"_id"} and not isinstance(query["_id"], dict):
+            return self._docs.get(query["_id"])
+        return next((d for d in self._docs.values() if matches(d, query)), None)
+
+    def _update(self, query: dict, update, upsert: bool):
+        doc = self._find_first(query)
+        if doc is not None:
+            _apply_update(doc, update, inserting=False)
+            return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if not upsert:
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+        doc = {k: v for k, v in query.items() if not isinstance(v, dict)}
+        _apply_update(doc, update, inserting=True)
+        doc.setdefault("_id", ObjectId())
+        self._docs[doc["_id"]] = doc
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=doc["_id"])
+
+    def _replace(self, query: dict, replacement: dict, upsert: bool):
+        doc = self._find_first(query)
+        if doc is None and not upsert:
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+        new = copy.deepcopy(replacement)
+        new["_id"] = doc["_id"] if doc is not None else new.get("_id", ObjectId())
+        if doc is not None:
+            del self._docs[doc["_id"]]
+        self._docs[new["_id"]] = new
+        return SimpleNamespace(matched_count=int(doc is not None), modified_count=int(doc is not None),
+                               upserted_id=None if doc is not None else new["_id"])
+
+    async def find_one(self, query: dict, projection=None):
+        await self._delay()
+        doc = self._find_first(query)
+        return _project(doc, projection) if doc is not None else None
+
+    def find(self, query: dict = None, projection=None) -> InMemoryCursor:
+        return InMemoryCursor(self, query or {}, projection)
+
+    async def update_one(self, query: dict, update, upsert: bool = False):
+        await self._delay()
+        return self._update(query, update, upsert)
+
+    async def replace_one(self, query: dict, replacement: dict, upsert: bool = False):
+        await self._delay()
+        return self._replace(query, replacement, upsert)
+
+    async def bulk_write(self, ops: list, ordered: bool = True):
+        await self._delay()
+        for op in ops:
+            if isinstance(op, UpdateOne):
+                self._update(op._filter, op._doc, op._upsert)
+            elif isinstance(op, ReplaceOne):
+                self._replace(op._filter, op._doc, op._upsert)
+            elif isinstance(op, DeleteOne):
+                doc = self._find_first(op._filter)
+                if doc is not None:
+                    del self._docs[doc["_id"]]
+            else:
+                raise NotImplementedError(type(op).__name__)
+        return SimpleNamespace(bulk_api_result={})
+
+    async def update_many(self, query: dict, update):
+        await self._delay()
+        docs = [d for d in self._docs.values() if matches(d, query)]
+        for doc in docs:
+            _apply_update(doc, update, inserting=False)
+        return SimpleNamespace(matched_count=len(docs), modified_count=len(docs), upserted_id=None)
+
+    async def delete_one(self, query: dict):
+        await self._delay()
+        doc = self._find_first(query)
+        if doc is not None:
+            del self._docs[doc["_id"]]
+        return SimpleNamespace(deleted_count=int(doc is not None))
+
+    async def delete_many(self, query: dict):
+        await self._delay()
+        ids = [k for k, d in self._docs.items() if matches(d, query)]
+        for k in ids:
+            del self._docs[k]
+        return SimpleNamespace(deleted_count=len(ids))
+
+    async def count_documents(self, query: dict) -> int:
+        await self._delay()
+        return sum(1 for d in self._docs.values() if matches(d, query))
+
+    async def estimated_document_count(self) -> int:
+        return len(self._docs)
+
+    async def create_index(self, keys, **kwargs) -> str:
+        keys = [(keys, 1)] if isinstance(keys, str) else list(keys)
+        name = "_".join(f"{k}_{d}" for k, d in keys)
+        self._indexes[name] = {"key": keys, **kwargs}
+        return name
+
+    async def create_indexes(self, models) -> List[str]:
+        names = []
+        for model in models:
+            spec = dict(model.document)
+            key = list(spec.pop("key").items())
+            spec.pop("name", None)
+            names.append(await self.create_index(key, **spec))
+        return names
+
+    async def index_information(self) -> dict:
+        return copy.deepcopy(self._indexes)
+
+
+class InMemoryDatabase:
+    def __init__(self, name: str, latency: float = 0.0):
+        self.name = name
+        self.latency = latency
+        self._collections: Dict[str, InMemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = InMemoryCollection(name, self.latency)
+        return self._collections[name]
+
+    async def command(self, name: str, collection: str = None):
+        if name == "collStats":
+            docs = self[collection]._docs
+            size = sum(len(repr(d)) for d in docs.values())
+            return {"count": len(docs), "size": size, "storageSize": size, "totalIndexSize": 0,
+                    "avgObjSize": size // len(docs) if docs else 0}
+        if name == "ping":
+            return {"ok": 1}
+        raise NotImplementedError(name)
+
+
+class InMemoryMongoClient:
+    """Drop-in for AsyncIOMotorClient(uri); the uri is ignored."""
+
+    def __init__(self, uri: str = None, latency: float = 0.0):
+        self.latency = latency
+        self._dbs: Dict[str, InMemoryDatabase] = {}
+
+    def __getitem__(self, name: str) -> InMemoryDatabase:
+        if name not in self._dbs:
+            self._dbs[name] = InMemoryDatabase(name, self.latency)
+        return self._dbs[name]
+
+    def close(self):
+        pass
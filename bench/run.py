@@ -0,0 +1,287 @@
+# agno_pipeline/bench/run.py
+"""
+Offline benchmark for ingest_text, verify_fact, retrieve_and_answer and prune_facts.
+
+Model servers and Serper are replaced by latency-injecting stubs (bench/stubs.py),
+Qdrant runs in-memory (QDRANT_LOCATION=":memory:") and Mongo by an in-process
+stand-in (bench/mongo_stub.py). Each (corpus size, concurrency) pair runs in a fresh
+subprocess so caches and stores start empty.
+
+    python -m agno_pipeline.bench.run --corpus-sizes 200,1000 --concurrency 8,32
+    python -m agno_pipeline.bench.run --out new.json --compare baseline.json
+
+Reports throughput, p50/p95/p99 latency and per-stage call breakdowns as JSON.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from agno_pipeline.bench.stubs import StubServer, add_latency_args, latency_from_args
+from agno_pipeline.bench.timing import StageTimer, percentiles
+
+logger = logging.getLogger("bench")
+logger.setLevel(logging.INFO)
+
+WORKLOADS = ("ingest", "verify", "query", "prune")
+
+_SUBJECTS = ["Paris", "The Nile", "Mount Everest", "Python", "The Moon", "Jupiter", "Insulin", "Photosynthesis",
+             "The Amazon", "Shakespeare", "Mitochondria", "The Pacific", "Copper", "Tokyo", "DNA", "Vaccines"]
+_PREDICATES = ["is located in", "was discovered by", "is larger than", "depends on", "was first described in",
+               "is measured in", "is part of", "produces", "is older than", "is used for"]
+
+
+def build_corpus(size: int, dup_frac: float, seed: int) -> List[str]:
+    """Synthetic claim texts; dup_frac of them repeat an earlier text to exercise merging."""
+    rng = random.Random(seed)
+    texts = []
+    for i in range(size):
+        if texts and rng.random() < dup_frac:
+            texts.append(rng.choice(texts))
+        else:
+            texts.append(f"{rng.choice(_SUBJECTS)} {rng.choice(_PREDICATES)} item {i} of set {rng.randint(0, 99)}.")
+    return texts
+
+
+async def run_workload(ops: List[Callable[[], Awaitable]], concurrency: int, timer: StageTimer) -> Dict:
+    timer.reset()
+    sem = asyncio.Semaphore(concurrency)
+    latencies, errors = [], []
+
+    async def one(op):
+        async with sem:
+            start = time.perf_counter()
+            try:
+                await op()
+            except Exception as e:
+                errors.append(repr(e))
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(op) for op in ops))
+    wall = time.perf_counter() - start
+    return {
+        "ops": len(ops),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "wall_s": wall,
+        "throughput_ops_s": len(ops) / wall if wall > 0 else 0.0,
+        "latency_ms": percentiles(latencies),
+        "stages": timer.summary(),
+    }
+
+
+def instrument(timer: StageTimer):
+    from agno_pipeline.db.mongo_client import mongo_client
+    from agno_pipeline.db.qdrant_client import qdrant_client
+    from agno_pipeline.models.embedding import async_embedding_client
+    from agno_pipeline.models.reranker import async_reranker_client
+    from agno_pipeline.models.vllm_client import async_vllm_client
+    from agno_pipeline.agents.evidence import evidence_cache
+    from agno_pipeline.db.outbox import outbox_flusher
+
+    timer.wrap(async_embedding_client, "embed_batch", "tei.embed")
+    timer.wrap(async_reranker_client, "score_many", "tei.rerank")
+    timer.wrap(async_vllm_client, "generate", "vllm.generate")
+    timer.wrap(async_vllm_client, "generate_stream", "vllm.generate_stream")
+    timer.wrap(async_vllm_client, "extract_claims", "vllm.extract_claims")
+    timer.wrap(async_vllm_client, "entailment_probs", "vllm.entailment_probs")
+    timer.wrap(evidence_cache, "search", "serper.search")
+    timer.wrap(outbox_flusher, "flush_once", "outbox.flush")
+    timer.wrap_public(mongo_client, "mongo")
+    timer.wrap_public(qdrant_client, "qdrant")
+
+
+async def run_single(args) -> Dict:
+    """Runs inside the child process, after the environment points at the stubs."""
+    from agno_pipeline.bench import mongo_stub
+    from agno_pipeline.db import mongo_client as mongo_module
+
+    mongo_module.AsyncIOMotorClient = lambda uri: mongo_stub.InMemoryMongoClient(uri, args.mongo_ms / 1000.0)
+    mongo_module.mongo_client.connect()
+    await mongo_module.mongo_client.ensure_indexes()
+
+    from agno_pipeline.agents.ingestion import ingest_text
+    from agno_pipeline.agents.verifications import verify_fact
+    from agno_pipeline.agents.query_time import retrieve_and_answer
+    from agno_pipeline.agents.pruning import prune_facts
+    from agno_pipeline.models.http_client import close_http_client
+    from agno_pipeline.db.outbox import outbox_flusher
+
+    mongo_client = mongo_module.mongo_client
+    timer = StageTimer()
+    instrument(timer)
+    outbox_flusher.start()
+    rng = random.Random(args.seed)
+    corpus = build_corpus(args.corpus_size, args.dup_frac, args.seed)
+    results = {}
+
+    if "ingest" in args.workloads:
+        results["ingest"] = await run_workload(
+            [lambda t=t, i=i: ingest_text(f"bench-user-{i % 8}", f"bench-session-{i}", t) for i, t in enumerate(corpus)],
+            args.concurrency, timer)
+
+    await outbox_flusher.drain()  # queries should see every ingested point
+    fact_ids = [d["fact_id"] for d in await mongo_client.get_all_facts()]
+    if "verify" in args.workloads:
+        targets = fact_ids[:args.verify_count] if args.verify_count else fact_ids
+        results["verify"] = await run_workload(
+            [lambda f=f: verify_fact(f) for f in targets], args.concurrency, timer)
+
+    await outbox_flusher.drain()
+    if "query" in args.workloads:
+        queries = [rng.choice(corpus) for _ in range(args.queries)]
+        results["query"] = await run_workload(
+            [lambda q=q: retrieve_and_answer(q, args.top_k) for q in queries], args.concurrency, timer)
+
+    if "prune" in args.workloads:
+        expired = rng.sample(fact_ids, int(len(fact_ids) * args.expire_frac))
+        await mongo_client.set_fields_many({f: {"expires_at": 0.0} for f in expired})
+        pruned = {}
+
+        async def prune():
+            pruned.update(await prune_facts())
+
+        results["prune"] = await run_workload([prune], 1, timer)
+        results["prune"]["pruned"] = pruned.get("pruned", 0)
+        results["prune"]["pruned_per_s"] = pruned.get("pruned", 0) / max(results["prune"]["wall_s"], 1e-9)
+
+    await outbox_flusher.stop()
+    results["facts_stored"] = len(fact_ids)
+    await close_http_client()
+    return results
+
+
+def child_env(args, stub_url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "TEI_EMBEDDING_URL": stub_url,
+        "TEI_RERANKER_URL": stub_url,
+        "VLLM_URL": stub_url,
+        "SERPER_URL": f"{stub_url}/search",
+        "SERPER_API_KEY": "bench",
+        "QDRANT_LOCATION": ":memory:",
+        "QDRANT_VECTOR_DIM": str(args.dim),
+    })
+    if args.answer_cache:
+        env["ANSWER_CACHE_BACKEND"] = args.answer_cache
+    return env
+
+
+def run_matrix(args) -> Dict:
+    stub = StubServer(latency=latency_from_args(args), dim=args.dim).start()
+    runs = []
+    try:
+        for size in args.corpus_sizes:
+            for concurrency in args.concurrency:
+                logger.info("Running corpus_size=%d concurrency=%d", size, concurrency)
+                cmd = [sys.executable, "-m", "agno_pipeline.bench.run", "--child",
+                       "--corpus-size", str(size), "--single-concurrency", str(concurrency)] + args.passthrough
+                proc = subprocess.run(cmd, env=child_env(args, stub.url), capture_output=True, text=True)
+                if proc.returncode != 0:
+                    logger.error("Run failed:\n%s", proc.stderr[-4000:])
+                    runs.append({"corpus_size": size, "concurrency": concurrency, "error": proc.stderr[-1000:]})
+                    continue
+                workloads = json.loads(proc.stdout.strip().splitlines()[-1])
+                runs.append({"corpus_size": size, "concurrency": concurrency, "workloads": workloads})
+    finally:
+        stub.stop()
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {
+            "workloads": args.workloads, "queries": args.queries, "top_k": args.top_k,
+            "dup_frac": args.dup_frac, "expire_frac": args.expire_frac, "dim": args.dim,
+            "mongo_ms": args.mongo_ms, "answer_cache": args.answer_cache, "seed": args.seed,
+            "latency": latency_from_args(args),
+        },
+        "runs": runs,
+    }
+
+
+def print_summary(report: Dict, baseline: Dict = None):
+    base = {}
+    for run in (baseline or {}).get("runs", []):
+        base[(run["corpus_size"], run["concurrency"])] = run.get("workloads", {})
+
+    def delta(new, old):
+        return f" ({(new - old) / old * 100:+.1f}%)" if old else ""
+
+    for run in report["runs"]:
+        print(f"\ncorpus_size={run['corpus_size']} concurrency={run['concurrency']}")
+        if "error" in run:
+            print("  FAILED")
+            continue
+        old_run = base.get((run["corpus_size"], run["concurrency"]), {})
+        for name in WORKLOADS:
+            w = run["workloads"].get(name)
+            if not w:
+                continue
+            old = old_run.get(name, {})
+            lat, old_lat = w["latency_ms"], old.get("latency_ms", {})
+            print(f"  {name:7s} {w['throughput_ops_s']:9.1f} ops/s{delta(w['throughput_ops_s'], old.get('throughput_ops_s'))}"
+                  f"  p50 {lat['p50']:8.1f} ms{delta(lat['p50'], old_lat.get('p50'))}"
+                  f"  p95 {lat['p95']:8.1f} ms{delta(lat['p95'], old_lat.get('p95'))}"
+                  f"  p99 {lat['p99']:8.1f} ms{delta(lat['p99'], old_lat.get('p99'))}"
+                  f"  errors {w['errors']}")
+            top = sorted(w["stages"].items(), key=lambda kv: kv[1]["total_s"], reverse=True)[:5]
+            for stage, s in top:
+                print(f"      {stage:32s} {s['calls']:6d} calls  {s['total_s']:8.2f} s  p95 {s['latency_ms']['p95']:7.1f} ms")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark with stubbed model servers")
+    parser.add_argument("--corpus-sizes", default="200", help="comma-separated corpus sizes")
+    parser.add_argument("--concurrency", default="16", help="comma-separated in-flight operation limits")
+    parser.add_argument("--workloads", default=",".join(WORKLOADS))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--verify-count", type=int, default=0, help="facts to verify (0 = all)")
+    parser.add_argument("--dup-frac", type=float, default=0.1)
+    parser.add_argument("--expire-frac", type=float, default=0.2)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--mongo-ms", type=float, default=0.5, help="simulated Mongo round trip")
+    parser.add_argument("--answer-cache", choices=("local", "qdrant", "off"), default=None)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default=None, help="JSON output path (default bench-<timestamp>.json)")
+    parser.add_argument("--compare", default=None, help="baseline JSON to diff against")
+    add_latency_args(parser)
+    # internal: one run inside a child process
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--corpus-size", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--single-concurrency", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    args.passthrough = list(argv if argv is not None else sys.argv[1:])
+    args.corpus_sizes = [int(x) for x in str(args.corpus_sizes).split(",") if x]
+    args.concurrency = [int(x) for x in str(args.concurrency).split(",") if x]
+    args.workloads = [w for w in args.workloads.split(",") if w in WORKLOADS]
+    return args
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.WARNING)
+    args = parse_args(argv)
+    if args.child:
+        args.concurrency = args.single_concurrency
+        print(json.dumps(asyncio.run(run_single(args))))
+        return
+
+    report = run_matrix(args)
+    out = args.out or time.strftime("bench-%Y%m%d-%H%M%S.json")
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_summary(report, baseline)
+    print(f"\nResults written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# agno_pipeline/bench/stubs.py
+"""
+Latency-injecting stand-ins for the model servers and Serper, speaking the same wire
+formats the clients use:
+    POST /embed      TEI embeddings   {"inputs": [...]}            -> [[float, ...], ...]
+    POST /rerank     TEI reranker     {"query", "documents"}       -> [{"index", "score"}, ...]
+    POST /generate   vLLM             {"prompt", "max_tokens", "stream"?}
+    POST /v1/completions  vLLM (OpenAI) {"prompt": [...], "max_tokens": 1, "logprobs"}
+                                      -> {"choices": [{"index", "text", "logprobs"}, ...]}
+    POST /search     Serper           {"q", "num"}                 -> {"organic": [...]}
+
+Outputs are deterministic per input (hash-seeded) so runs are comparable. Latency per
+call is base + per-item cost (texts, documents or generated tokens), with +/- jitter.
+
+Standalone:
+    python -m agno_pipeline.bench.stubs --port 8089 --embed-ms 5 --token-ms 20
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+import numpy as np
+
+DEFAULT_LATENCY = {
+    "embed_ms": 8.0,          # per request
+    "embed_item_ms": 0.5,     # per input text
+    "rerank_ms": 10.0,
+    "rerank_item_ms": 1.0,    # per document
+    "generate_ms": 40.0,      # prefill / time to first token
+    "token_ms": 15.0,         # per generated token
+    "completion_item_ms": 2.0,  # per prompt in a batched /v1/completions call
+    "serper_ms": 250.0,
+    "jitter": 0.1,            # +/- fraction applied to every delay
+}
+
+
+def _seed(*parts: str) -> int:
+    return int.from_bytes(hashlib.sha256("\x00".join(parts).encode("utf-8")).digest()[:8], "little")
+
+
+def stub_vector(text: str, dim: int) -> list:
+    vec = np.random.default_rng(_seed(text)).standard_normal(dim).astype(np.float32)
+    return (vec / np.linalg.norm(vec)).tolist()
+
+
+def stub_score(query: str, doc: str) -> float:
+    """Relevance in [0.5, 1.0): stubs stand in for evidence that mostly supports the claim."""
+    return 0.5 + 0.5 * random.Random(_seed(query, doc)).random()
+
+
+def stub_completion(prompt: str, max_tokens: int) -> str:
+    rng = random.Random(_seed(prompt))
+    words = prompt.split()[-64:] or ["answer"]
+    return " ".join(rng.choice(words) for _ in range(max(1, min(max_tokens, 48))))
+
+
+def stub_answer_logprobs(prompt: str, k: int) -> dict:
+    """Top-k logprobs for a Yes/No answer token; P(Yes) in [0.6, 0.95) like the other stubs."""
+    p_yes = random.Random(_seed(prompt)).uniform(0.6, 0.95)
+    top = {" Yes": math.log(p_yes * 0.98), " No": math.log((1 - p_yes) * 0.98), " The": math.log(0.01)}
+    return dict(list(top.items())[:max(1, k)])
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency: Dict[str, float] = DEFAULT_LATENCY
+    dim: int = 1536
+
+    def log_message(self, format, *args):
+        pass
+
+    def _sleep(self, ms: float):
+        jitter = self.latency["jitter"]
+        time.sleep(max(0.0, ms * (1 + random.uniform(-jitter, jitter))) / 1000.0)
+
+    def _send_json(self, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        lat = self.latency
+        path = self.path.rstrip("/")
+        if path == "/embed":
+            texts = payload["inputs"] if isinstance(payload["inputs"], list) else [payload["inputs"]]
+            self._sleep(lat["embed_ms"] + lat["embed_item_ms"] * len(texts))
+            self._send_json([stub_vector(t, self.dim) for t in texts])
+        elif path == "/rerank":
+            docs = payload.get("documents") or payload.get("texts") or []
+            self._sleep(lat["rerank_ms"] + lat["rerank_item_ms"] * len(docs))
+            scores = [{"index": i, "score": stub_score(payload["query"], d)} for i, d in enumerate(docs)]
+            self._send_json(sorted(scores, key=lambda s: s["score"], reverse=True))
+        elif path == "/generate":
+            self._generate(payload)
+        elif path == "/v1/completions":
+            self._completions(payload)
+        elif path == "/search":
+            self._sleep(lat["serper_ms"])
+            q, num = payload.get("q", ""), int(payload.get("num", 10))
+            self._send_json({"organic": [
+                {"title": f"Result {i} for {q[:40]}", "link": f"https://source{i}.example.com/{_seed(q) % 10000}",
+                 "snippet": f"{q} (source {i})"}
+                for i in range(num)
+            ]})
+        else:
+            self.send_error(404)
+
+    def _completions(self, payload: dict):
+        prompts = payload["prompt"] if isinstance(payload["prompt"], list) else [payload["prompt"]]
+        k = int(payload.get("logprobs") or 0)
+        # one batched prefill plus a single decode step, as for max_tokens=1
+        self._sleep(self.latency["generate_ms"] + self.latency["completion_item_ms"] * len(prompts)
+                    + self.latency["token_ms"])
+        choices = []
+        for i, prompt in enumerate(prompts):
+            top = stub_answer_logprobs(prompt, k)
+            token = max(top, key=top.get)
+            logprobs = {"tokens": [token], "token_logprobs": [top[token]], "top_logprobs": [top]} if k else None
+            choices.append({"index": i, "text": token, "logprobs": logprobs, "finish_reason": "length"})
+        self._send_json({"object": "text_completion", "choices": choices})
+
+    def _generate(self, payload: dict):
+        prompt, max_tokens = payload["prompt"], int(payload.get("max_tokens", 512))
+        text = stub_completion(prompt, max_tokens)
+        tokens = text.split(" ")
+        self._sleep(self.latency["generate_ms"])
+        if not payload.get("stream"):
+            self._sleep(self.latency["token_ms"] * len(tokens))
+            self._send_json({"text": text})
+            return
+        # vLLM streams NUL-delimited JSON chunks holding prompt + cumulative text
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i in range(1, len(tokens) + 1):
+            self._sleep(self.latency["token_ms"])
+            self._write_chunk(json.dumps({"text": [prompt + " ".join(tokens[:i])]}).encode("utf-8") + b"\0")
+        self._write_chunk(b"")
+
+
+class StubServer:
+    """ThreadingHTTPServer on a background thread; each request sleeps on its own thread."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: Dict[str, float] = None, dim: int = 1536):
+        handler = type("BoundStubHandler", (StubHandler,), {
+            "latency": {**DEFAULT_LATENCY, **(latency or {})},
+            "dim": dim,
+        })
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def add_latency_args(parser: argparse.ArgumentParser):
+    for key, default in DEFAULT_LATENCY.items():
+        parser.add_argument("--" + key.replace("_", "-"), type=float, default=default, dest=key)
+
+
+def latency_from_args(args) -> Dict[str, float]:
+    return {key: getattr(args, key) for key in DEFAULT_LATENCY}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve latency-injecting TEI/vLLM/Serper stubs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--dim", type=int, default=1536)
+    add_latency_args(parser)
+    args = parser.parse_args(argv)
+    server = StubServer(args.host, args.port, latency_from_args(args), args.dim)
+    print(f"Stub server on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
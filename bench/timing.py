@@ -0,0 +1,82 @@
+# agno_pipeline/bench/timing.py
+import inspect
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import numpy as np
+
+
+def percentiles(samples_s: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean/max in milliseconds."""
+    if not samples_s:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0, "max": 0.0}
+    ms = np.asarray(samples_s) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99),
+            "mean": float(ms.mean()), "max": float(ms.max())}
+
+
+class StageTimer:
+    """
+    Per-stage call latencies, collected by wrapping client methods in place.
+    Sync methods (Qdrant, run via to_thread) record from worker threads.
+    """
+
+    def __init__(self):
+        self._samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self._samples[stage].append(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._samples = defaultdict(list)
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            samples = dict(self._samples)
+        return {
+            stage: {"calls": len(s), "total_s": float(sum(s)), "latency_ms": percentiles(s)}
+            for stage, s in sorted(samples.items())
+        }
+
+    def wrap(self, obj, attr: str, stage: str):
+        original = getattr(obj, attr)
+        record = self.record
+
+        if inspect.isasyncgenfunction(original):
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    async for item in original(*args, **kwargs):
+                        yield item
+                finally:
+                    record(stage, time.perf_counter() - start)
+        elif inspect.iscoroutinefunction(original):
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    record(stage, time.perf_counter() - start)
+        else:
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    record(stage, time.perf_counter() - start)
+
+        wrapper.__wrapped__ = original
+        setattr(obj, attr, wrapper)
+
+    def wrap_public(self, obj, prefix: str, skip=("connect", "close")):
+        """Wrap every public method of obj as '<prefix>.<method>'."""
+        for name in dir(type(obj)):
+            if name.startswith("_") or name in skip or not callable(getattr(obj, name)):
+                continue
+            self.wrap(obj, name, f"{prefix}.{name}")
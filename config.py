@@ -11,20 +11,139 @@ MONGO_DB = os.getenv("MONGO_DB", "agno")
 # Qdrant
 QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
 QDRANT_PORT = int(os.getenv("QDRANT_PORT", 6333))
+# Embedded local mode instead of a server: ":memory:" or a directory (benchmarks, offline runs)
+QDRANT_LOCATION = os.getenv("QDRANT_LOCATION", "")
 QDRANT_COLLECTION = os.getenv("QDRANT_COLLECTION", "facts")
+QDRANT_VECTOR_DIM = int(os.getenv("QDRANT_VECTOR_DIM", 1536))
+# "scalar" (int8), "binary" or "none"; originals stay on disk and are used for rescoring
+QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "scalar").lower()
+QDRANT_ON_DISK = os.getenv("QDRANT_ON_DISK", "true").lower() in ("1", "true", "yes")
+QDRANT_OVERSAMPLING = float(os.getenv("QDRANT_OVERSAMPLING", 2.0))
 
 # Serper API
 SERPER_API_KEY = os.getenv("SERPER_API_KEY")
+SERPER_URL = os.getenv("SERPER_URL", "https://google.serper.dev/search")
+SERPER_TIMEOUT = float(os.getenv("SERPER_TIMEOUT", 15))
+
+# Web evidence cache: in-memory LRU plus optional persistent tier ("mongo" or "none")
+EVIDENCE_CACHE_TTL_SECONDS = int(os.getenv("EVIDENCE_CACHE_TTL_SECONDS", 24 * 3600))
+EVIDENCE_CACHE_SIZE = int(os.getenv("EVIDENCE_CACHE_SIZE", 10000))
+EVIDENCE_CACHE_PERSIST = os.getenv("EVIDENCE_CACHE_PERSIST", "mongo").lower()
+EVIDENCE_CACHE_COLLECTION = os.getenv("EVIDENCE_CACHE_COLLECTION", "evidence_cache")
 
 # TEI Servers
 TEI_EMBEDDING_URL = os.getenv("TEI_EMBEDDING_URL", "http://tei-embedding:8080")
 TEI_RERANKER_URL = os.getenv("TEI_RERANKER_URL", "http://tei-reranker:8080")
+TEI_EMBEDDING_MODEL = os.getenv("TEI_EMBEDDING_MODEL", "Qwen/Qwen2.5-embedding")
+
+# vLLM Server
+VLLM_URL = os.getenv("VLLM_URL", "http://vllm:8000")
+# OpenAI-compatible server (/v1/completions) used for batched entailment; VLLM_MODEL is
+# the served model name (empty: let the server pick its only model)
+VLLM_COMPLETIONS_URL = os.getenv("VLLM_COMPLETIONS_URL", VLLM_URL)
+VLLM_MODEL = os.getenv("VLLM_MODEL", "")
+# Entailment: prompts per /v1/completions request, wait to coalesce concurrent facts,
+# and top-k logprobs searched for the Yes/No answer token
+ENTAIL_BATCH_SIZE = int(os.getenv("ENTAIL_BATCH_SIZE", 64))
+ENTAIL_BATCH_WAIT_MS = float(os.getenv("ENTAIL_BATCH_WAIT_MS", 5))
+ENTAIL_TOP_LOGPROBS = int(os.getenv("ENTAIL_TOP_LOGPROBS", 5))
+
+# Shared HTTP client pool for model servers
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", 20))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 60))
+HTTP_HTTP2 = os.getenv("HTTP_HTTP2", "false").lower() in ("1", "true", "yes")
 
 # Verification thresholds
 VERIFY_HIGH_THRESHOLD = float(os.getenv("VERIFY_HIGH_THRESHOLD", 0.85))
 VERIFY_LOW_THRESHOLD = float(os.getenv("VERIFY_LOW_THRESHOLD", 0.55))
 RERANK_THRESH = float(os.getenv("RERANK_THRESH", 0.7))
+# skip entailment for snippets whose rerank score is below RERANK_THRESH
+VERIFY_EARLY_EXIT = os.getenv("VERIFY_EARLY_EXIT", "false").lower() in ("1", "true", "yes")
 STAGING_CONFIRM_K = int(os.getenv("STAGING_CONFIRM_K", 2))
 STAGING_WINDOW_SECONDS = int(os.getenv("STAGING_WINDOW_SECONDS", 48 * 3600))
 DECAY_HALF_LIFE_SECONDS = int(os.getenv("DECAY_HALF_LIFE_SECONDS", 30 * 24 * 3600))
 PRUNE_THRESHOLD = float(os.getenv("PRUNE_THRESHOLD", 0.15))
+PRUNE_BATCH_SIZE = int(os.getenv("PRUNE_BATCH_SIZE", 1000))
+
+# Query-time retrieval: only facts in these statuses compete for the prompt
+QUERY_STATUSES = [s.strip() for s in os.getenv("QUERY_STATUSES", "production").split(",") if s.strip()]
+QUERY_MIN_TRUST = float(os.getenv("QUERY_MIN_TRUST", 0.0))
+QUERY_SCOPE_TO_USER = os.getenv("QUERY_SCOPE_TO_USER", "false").lower() in ("1", "true", "yes")
+
+# Query prompt packing (approximate tokens): context budget, per-fact cap, smallest
+# useful fact remnant, word-set Jaccard above which a fact is a near-duplicate, and
+# the answer length, bounded by what is left of the model's context window
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", 1536))
+CONTEXT_FACT_MAX_TOKENS = int(os.getenv("CONTEXT_FACT_MAX_TOKENS", 160))
+CONTEXT_MIN_FACT_TOKENS = int(os.getenv("CONTEXT_MIN_FACT_TOKENS", 16))
+CONTEXT_DEDUP_JACCARD = float(os.getenv("CONTEXT_DEDUP_JACCARD", 0.8))
+# share of CONTEXT_MAX_TOKENS the user query may take; longer queries keep their end
+CONTEXT_QUERY_SHARE = float(os.getenv("CONTEXT_QUERY_SHARE", 0.25))
+ANSWER_MAX_TOKENS = int(os.getenv("ANSWER_MAX_TOKENS", 512))
+VLLM_MAX_MODEL_LEN = int(os.getenv("VLLM_MAX_MODEL_LEN", 8192))
+
+# Semantic answer cache for /query: "local" (in-process), "qdrant" (shared collection) or "off"
+ANSWER_CACHE_BACKEND = os.getenv("ANSWER_CACHE_BACKEND", "local").lower()
+ANSWER_CACHE_MAX_DISTANCE = float(os.getenv("ANSWER_CACHE_MAX_DISTANCE", 0.05))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", 2000))
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", 3600))
+ANSWER_CACHE_COLLECTION = os.getenv("ANSWER_CACHE_COLLECTION", "answer_cache")
+
+# Near-duplicate claim merging at ingestion (cosine similarity)
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() in ("1", "true", "yes")
+DEDUP_SIMILARITY_THRESHOLD = float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", 0.95))
+
+# Bulk ingestion
+INGEST_EXTRACT_CONCURRENCY = int(os.getenv("INGEST_EXTRACT_CONCURRENCY", 16))
+INGEST_BULK_CHUNK = int(os.getenv("INGEST_BULK_CHUNK", 256))
+
+# Write-behind outbox: Qdrant changes are recorded in Mongo and group-committed by a
+# background flusher in each worker. "false" writes to Qdrant inline (best-effort).
+OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "true").lower() in ("1", "true", "yes")
+OUTBOX_COLLECTION = os.getenv("OUTBOX_COLLECTION", "qdrant_outbox")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 500))
+OUTBOX_FLUSH_INTERVAL_MS = float(os.getenv("OUTBOX_FLUSH_INTERVAL_MS", 200))
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", 30))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 10))
+# ingest dedup also scans this many not-yet-flushed upserts (newest first)
+OUTBOX_DEDUP_SCAN_LIMIT = int(os.getenv("OUTBOX_DEDUP_SCAN_LIMIT", 2000))
+
+# /ingest admission control: idempotency keys, per-tenant (user_id) token buckets and
+# queue-depth backpressure (429 + Retry-After). 0 disables the rate limit / depth check.
+ADMISSION_REDIS_URL = os.getenv("ADMISSION_REDIS_URL", "redis://localhost:6379/2")
+INGEST_DEDUP_TTL_SECONDS = int(os.getenv("INGEST_DEDUP_TTL_SECONDS", 600))
+INGEST_RATE_PER_SECOND = float(os.getenv("INGEST_RATE_PER_SECOND", 5))
+INGEST_RATE_BURST = int(os.getenv("INGEST_RATE_BURST", 50))
+INGEST_MAX_QUEUE_DEPTH = int(os.getenv("INGEST_MAX_QUEUE_DEPTH", 5000))
+INGEST_QUEUE_DEPTH_CACHE_SECONDS = float(os.getenv("INGEST_QUEUE_DEPTH_CACHE_SECONDS", 1))
+INGEST_BACKPRESSURE_RETRY_SECONDS = float(os.getenv("INGEST_BACKPRESSURE_RETRY_SECONDS", 5))
+
+# API readiness probe (/readyz): per-dependency timeout
+READY_TIMEOUT_SECONDS = float(os.getenv("READY_TIMEOUT_SECONDS", 2))
+
+# Prometheus: Celery workers serve /metrics on this port (0 disables). Prefork pools:
+# with PROMETHEUS_MULTIPROC_DIR (an empty, writable dir shared by the pod's processes)
+# this port serves the aggregate of all children; without it each child serves its own
+# metrics on WORKER_METRICS_PORT + 1 + pool index, and this port only the parent's.
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", 9100))
+
+# Fused ingest -> verify -> score -> admit runs: facts advanced concurrently per request
+FUSED_CONCURRENCY = int(os.getenv("FUSED_CONCURRENCY", 4))
+
+# Embedding micro-batching
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 32))
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", 5))
+
+# Reranker batching (keep in line with TEI --max-batch-tokens)
+RERANK_MAX_BATCH_TOKENS = int(os.getenv("RERANK_MAX_BATCH_TOKENS", 8192))
+RERANK_MAX_BATCH_SIZE = int(os.getenv("RERANK_MAX_BATCH_SIZE", 32))
+
+# Embedding cache: in-process LRU plus optional persistent tier ("mongo" or "none")
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", 50000))
+EMBED_CACHE_PERSIST = os.getenv("EMBED_CACHE_PERSIST", "mongo").lower()
+EMBED_CACHE_COLLECTION = os.getenv("EMBED_CACHE_COLLECTION", "embedding_cache")
+# persistent entries expire this long after they were written (TTL index)
+EMBED_CACHE_TTL_SECONDS = int(os.getenv("EMBED_CACHE_TTL_SECONDS", 7 * 24 * 3600))
@@ -1,7 +1,9 @@
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams
 from pymongo import MongoClient
 from datetime import datetime
+from agno_pipeline.config import MONGO_DB
+from agno_pipeline.db.indexes import FACT_INDEXES, check_index_info
+from agno_pipeline.db.vector_config import vector_params, quantization_config, storage_update
 
 # ========================
 # EMBEDDING & RERANKER TEMPLATES
@@ -61,6 +63,11 @@ def setup_mongodb():
     db.agents_stats.create_index([("agent_name", 1), ("date", 1)])
     db.source_registry.create_index([("source_id", 1)], unique=True)
 
+    # Pipeline facts live in the pipeline database
+    facts = mongo_client[MONGO_DB]["facts"]
+    facts.create_indexes(FACT_INDEXES)
+    print(f"  ✅ Facts indexes: {check_index_info(facts.index_information())}")
+
     # Sample log
     db.audit_logs.insert_one({
         "timestamp": datetime.utcnow().isoformat(),
@@ -78,7 +85,7 @@ def setup_mongodb():
 def setup_qdrant():
     print("📦 Setting up Qdrant collections...")
     client = QdrantClient(host="localhost", port=6333)
-    vector_params = VectorParams(size=4096, distance=Distance.COSINE)
+    quantization = quantization_config()
 
     collections = [
         "legal_docs",
@@ -90,11 +97,16 @@ def setup_qdrant():
         if not client.collection_exists(name):
             client.recreate_collection(
                 collection_name=name,
-                vectors_config=vector_params
+                vectors_config=vector_params(4096),
+                quantization_config=quantization
             )
             print(f"  ✅ Created collection: {name} with 4096-dim vectors")
         else:
             print(f"  ℹ️ Collection {name} already exists")
+            changes = storage_update(client.get_collection(name))
+            if changes:
+                client.update_collection(collection_name=name, **changes)
+                print(f"  ✅ Updated {name}: {', '.join(changes)}")
 
     print("📦 Qdrant setup complete.\n")
     return client
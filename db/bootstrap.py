@@ -0,0 +1,26 @@
+# agno_pipeline/db/bootstrap.py
+import asyncio
+import logging
+
+from agno_pipeline.db.mongo_client import mongo_client
+from agno_pipeline.db.qdrant_client import qdrant_client
+
+logger = logging.getLogger("store_bootstrap")
+logger.setLevel(logging.INFO)
+
+
+async def bootstrap_stores():
+    """
+    Create missing Mongo indexes and the Qdrant collection, for API and worker startup.
+    Failures are logged, never raised: each client retries on first use.
+    """
+    try:
+        health = await mongo_client.ensure_indexes()
+        if not health["ok"]:
+            logger.warning("Facts indexes unhealthy: %s", health)
+    except Exception:
+        logger.exception("Index bootstrap failed")
+    try:
+        await asyncio.to_thread(qdrant_client.ping)
+    except Exception:
+        logger.exception("Qdrant bootstrap failed; will retry on first use")
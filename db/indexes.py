@@ -0,0 +1,62 @@
+# agno_pipeline/db/indexes.py
+"""
+Index bootstrap for the facts collection.
+
+Run at API/worker startup (MongoDBClient.ensure_indexes) or as a CLI step:
+    python -m agno_pipeline.db.indexes          # create missing indexes, then check
+    python -m agno_pipeline.db.indexes --check  # only report health
+"""
+import sys
+from pymongo import ASCENDING, DESCENDING, IndexModel, MongoClient
+from agno_pipeline.config import MONGO_URI, MONGO_DB
+
+# Query shapes: lookups/upserts by fact_id, listing by subject, status counts and
+# ranking by trust, staleness scans by last_checked, pruning by expires_at,
+# confirmation thresholds.
+FACT_INDEXES = [
+    IndexModel([("fact_id", ASCENDING)], unique=True),
+    IndexModel([("status", ASCENDING), ("trust", DESCENDING)]),
+    IndexModel([("status", ASCENDING), ("last_checked", ASCENDING)]),
+    IndexModel([("subject", ASCENDING)]),
+    IndexModel([("expires_at", ASCENDING)]),
+    IndexModel([("confirmations", DESCENDING)]),
+]
+
+
+def check_index_info(index_info: dict, expected=FACT_INDEXES) -> dict:
+    """Compare collection.index_information() against the expected index specs."""
+    present = {tuple(info["key"]): info for info in index_info.values()}
+    missing, mismatched = [], []
+    for model in expected:
+        spec = model.document
+        key = tuple(spec["key"].items())
+        info = present.get(key)
+        if info is None:
+            missing.append(dict(spec["key"]))
+        elif bool(info.get("unique")) != bool(spec.get("unique")):
+            mismatched.append({"key": dict(spec["key"]), "unique": bool(info.get("unique"))})
+    return {"ok": not missing and not mismatched, "missing": missing, "mismatched": mismatched}
+
+
+async def ensure_fact_indexes(collection) -> dict:
+    """Idempotent: creating an existing index with the same spec is a no-op."""
+    await collection.create_indexes(FACT_INDEXES)
+    return await check_fact_indexes(collection)
+
+
+async def check_fact_indexes(collection) -> dict:
+    return check_index_info(await collection.index_information())
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    facts = MongoClient(MONGO_URI)[MONGO_DB]["facts"]
+    if "--check" not in argv:
+        facts.create_indexes(FACT_INDEXES)
+    health = check_index_info(facts.index_information())
+    print(health)
+    return 0 if health["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
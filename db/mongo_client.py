@@ -1,13 +1,55 @@
 # agno_pipeline/db/mongo_client.py
 import asyncio
+from typing import List
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from motor.motor_asyncio import AsyncIOMotorClient
 from agno_pipeline.config import MONGO_URI, MONGO_DB
+from agno_pipeline.db.indexes import ensure_fact_indexes, check_fact_indexes
+from agno_pipeline.metrics import instrument_methods
 
+FACT_STATUSES = ("staging", "production", "rejected")
+
+@instrument_methods("mongo")
 class MongoDBClient:
+    """Motor client created on first use, or by connect() on a worker's own event loop."""
+
     def __init__(self):
-        self.client = AsyncIOMotorClient(MONGO_URI)
-        self.db = self.client[MONGO_DB]
-        self.facts = self.db["facts"]
+        self._client = None
+
+    def connect(self):
+        """(Re)create the Motor client; workers call this inside their own event loop after fork."""
+        self._client = AsyncIOMotorClient(MONGO_URI)
+        self._db = self._client[MONGO_DB]
+        self._facts = self._db["facts"]
+
+    @property
+    def client(self):
+        if self._client is None:
+            self.connect()
+        return self._client
+
+    @property
+    def db(self):
+        if self._client is None:
+            self.connect()
+        return self._db
+
+    @property
+    def facts(self):
+        if self._client is None:
+            self.connect()
+        return self._facts
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+        self._client = None
+
+    async def ping(self) -> bool:
+        """Readiness probe: one round trip to the server."""
+        await self.db.command("ping")
+        return True
 
     async def insert_or_update_fact(self, fact_id: str, doc: dict):
         await self.facts.update_one(
@@ -16,9 +58,57 @@ class MongoDBClient:
             upsert=True
         )
 
+    async def bulk_upsert_facts(self, docs: List[dict]) -> dict:
+        """Upsert many facts in one unordered bulk_write; returns {index: errmsg} for rejected docs."""
+        if not docs:
+            return {}
+        ops = [UpdateOne({"fact_id": d["fact_id"]}, {"$set": d}, upsert=True) for d in docs]
+        try:
+            await self.facts.bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            return {err["index"]: err.get("errmsg", "write error") for err in e.details.get("writeErrors", [])}
+        return {}
+
+    async def merge_duplicate_facts(self, merges: List[tuple]) -> dict:
+        """
+        For each (fact_id, sources): append the sources and bump the confirmations counter
+        (facts written before the counter existed count as 1). Returns {index: errmsg}.
+        """
+        if not merges:
+            return {}
+        ops = [
+            UpdateOne({"fact_id": fid}, [{"$set": {
+                # $literal: caller data ('$'-prefixed user/session ids) must not be read as field paths
+                "sources": {"$concatArrays": [{"$ifNull": ["$sources", []]}, {"$literal": sources}]},
+                "confirmations": {"$add": [{"$ifNull": ["$confirmations", 1]}, 1]},
+            }}])
+            for fid, sources in merges
+        ]
+        try:
+            await self.facts.bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            return {err["index"]: err.get("errmsg", "write error") for err in e.details.get("writeErrors", [])}
+        return {}
+
+    async def update_fact_fields(self, fact_id: str, update: dict, expected_status: str = None) -> bool:
+        """
+        Apply a partial update ($set/$push) to one fact, optionally only while it is still
+        in expected_status. Returns whether a document matched.
+        """
+        query = {"fact_id": fact_id}
+        if expected_status is not None:
+            query["status"] = expected_status
+        result = await self.facts.update_one(query, update)
+        return result.matched_count == 1
+
     async def get_fact_by_id(self, fact_id: str):
         return await self.facts.find_one({"fact_id": fact_id})
 
+    async def get_fact_statuses(self, fact_ids: List[str]) -> dict:
+        """{fact_id: status} for the given ids; missing (pruned) facts are absent."""
+        cursor = self.facts.find({"fact_id": {"$in": fact_ids}}, {"fact_id": 1, "status": 1, "_id": 0})
+        return {d["fact_id"]: d.get("status") async for d in cursor}
+
     async def find_facts_by_subject(self, subject: str):
         cursor = self.facts.find({"subject": subject})
         return await cursor.to_list(length=None)
@@ -30,7 +120,56 @@ class MongoDBClient:
         cursor = self.facts.find({})
         return await cursor.to_list(length=None)
 
-# Singleton instance
+    async def fact_stats(self) -> dict:
+        """Counts and store sizes without reading any fact documents."""
+        total, coll_stats, *per_status = await asyncio.gather(
+            self.facts.estimated_document_count(),
+            self.db.command("collStats", self.facts.name),
+            *(self.facts.count_documents({"status": s}) for s in FACT_STATUSES),
+        )
+        return {
+            "count": total,
+            "by_status": dict(zip(FACT_STATUSES, per_status)),
+            "size_bytes": coll_stats.get("size", 0),
+            "storage_size_bytes": coll_stats.get("storageSize", 0),
+            "index_size_bytes": coll_stats.get("totalIndexSize", 0),
+            "avg_doc_size_bytes": coll_stats.get("avgObjSize", 0),
+        }
+
+    async def ensure_indexes(self) -> dict:
+        """Create any missing facts indexes and return their health."""
+        return await ensure_fact_indexes(self.facts)
+
+    async def check_indexes(self) -> dict:
+        return await check_fact_indexes(self.facts)
+
+    async def find_expired_fact_ids(self, now: float, limit: int) -> List[str]:
+        """Range scan on the expires_at index."""
+        cursor = self.facts.find({"expires_at": {"$lte": now}}, {"fact_id": 1, "_id": 0}).limit(limit)
+        return [d["fact_id"] async for d in cursor]
+
+    async def find_facts_without_expiry(self, limit: int) -> list:
+        cursor = self.facts.find(
+            {"expires_at": {"$exists": False}},
+            {"fact_id": 1, "trust": 1, "last_checked": 1, "first_seen": 1, "_id": 0}
+        ).limit(limit)
+        return await cursor.to_list(length=None)
+
+    async def set_fields_many(self, updates: dict):
+        """Bulk {fact_id: {field: value}} $set."""
+        if updates:
+            await self.facts.bulk_write(
+                [UpdateOne({"fact_id": fid}, {"$set": fields}) for fid, fields in updates.items()],
+                ordered=False
+            )
+
+    async def delete_facts(self, fact_ids: List[str]) -> int:
+        if not fact_ids:
+            return 0
+        result = await self.facts.delete_many({"fact_id": {"$in": fact_ids}})
+        return result.deleted_count
+
+# Singleton instance (lazy: no client until first use)
 mongo_client = MongoDBClient()
 
 # Helper for sync Celery tasks
@@ -0,0 +1,334 @@
+# agno_pipeline/db/outbox.py
+"""
+Write-behind outbox for Qdrant.
+
+Stages write the fact to Mongo, then record the Qdrant change they need in the
+outbox collection instead of calling Qdrant. There is one outbox record per fact
+(_id = fact_id) holding the *desired* point state, so later writes coalesce into it:
+  - upsert       replaces op/vector/payload
+  - set_payload  merges fields into the pending payload (an upsert stays an upsert)
+  - delete       supersedes anything pending
+Every write bumps `version`. The flusher claims records under a lease, applies them
+as at most three Qdrant requests (upsert_facts, set_payload_batch, delete_facts) and
+acks each record only if its version is unchanged, so a write that lands mid-flush is
+flushed again rather than lost. Applying a record twice is harmless (all ops are
+idempotent). Failures back off exponentially; after OUTBOX_MAX_ATTEMPTS a record is
+parked (dead=True) and logged.
+
+With OUTBOX_ENABLED=false the same calls write to Qdrant directly (best-effort).
+"""
+import asyncio
+import logging
+import time
+import uuid
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from bson import Binary
+from pymongo import ASCENDING, DeleteOne, UpdateOne
+
+from agno_pipeline.config import (
+    OUTBOX_ENABLED,
+    OUTBOX_COLLECTION,
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_FLUSH_INTERVAL_MS,
+    OUTBOX_LEASE_SECONDS,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_DEDUP_SCAN_LIMIT,
+)
+from agno_pipeline.db.mongo_client import mongo_client
+from agno_pipeline.db.qdrant_client import qdrant_client, to_payload
+from agno_pipeline.db.vector_config import as_float32
+from agno_pipeline.metrics import instrumented, timed_stage
+
+logger = logging.getLogger("qdrant_outbox")
+logger.setLevel(logging.INFO)
+
+MAX_BACKOFF_SECONDS = 300.0
+
+
+def apply_ops(ops: Dict[str, dict]) -> Dict[str, str]:
+    """
+    Apply {fact_id: record} to Qdrant, one request per op kind. If a grouped request
+    fails its records are retried one by one to isolate the bad ones.
+    Returns {fact_id: error} for records that could not be applied.
+    """
+    groups = {"upsert": [], "set_payload": [], "delete": []}
+    for fid, rec in ops.items():
+        groups[rec["op"]].append(fid)
+
+    def run(kind: str, fids: List[str]):
+        if kind == "upsert":
+            qdrant_client.upsert_facts([
+                (fid, np.frombuffer(ops[fid]["vector"], dtype=np.float32), ops[fid]["payload"]) for fid in fids
+            ])
+        elif kind == "set_payload":
+            qdrant_client.set_payload_batch({fid: ops[fid]["payload"] for fid in fids})
+        else:
+            qdrant_client.delete_facts(fids)
+
+    failed = {}
+    for kind, fids in groups.items():
+        if not fids:
+            continue
+        try:
+            run(kind, fids)
+        except Exception:
+            if len(fids) == 1:
+                logger.exception("Qdrant %s failed for %s", kind, fids[0])
+                failed[fids[0]] = f"{kind} failed"
+                continue
+            logger.warning("Batched Qdrant %s of %d points failed; retrying individually", kind, len(fids))
+            for fid in fids:
+                try:
+                    run(kind, [fid])
+                except Exception as e:
+                    failed[fid] = f"{kind} failed: {e}"
+    return failed
+
+
+def nearest_ids(queries: np.ndarray, candidates: np.ndarray, ids: List[str], min_score: float,
+                allowed: np.ndarray = None) -> List[Optional[str]]:
+    """
+    Best cosine match per query row among candidate rows at or above min_score, else None.
+    allowed (queries x candidates, bool) masks out pairs that may not match.
+    """
+    def unit(m):
+        norms = np.linalg.norm(m, axis=1, keepdims=True)
+        return m / np.where(norms > 0, norms, 1.0)
+
+    sims = unit(queries) @ unit(candidates).T
+    if allowed is not None:
+        sims = np.where(allowed, sims, -np.inf)
+    best = sims.argmax(axis=1)
+    return [ids[j] if sims[i, j] >= min_score else None for i, j in enumerate(best)]
+
+
+class QdrantOutbox:
+    """Producer side: record desired Qdrant state next to the Mongo write."""
+
+    def __init__(self, collection_name: str = OUTBOX_COLLECTION, enabled: bool = OUTBOX_ENABLED):
+        self.collection_name = collection_name
+        self.enabled = enabled
+        self._indexed = False
+
+    @property
+    def collection(self):
+        return mongo_client.db[self.collection_name]
+
+    async def _ensure_indexes(self):
+        if not self._indexed:
+            await self.collection.create_index([("next_attempt_at", ASCENDING), ("lease_until", ASCENDING)])
+            # nearest_pending: newest live upserts
+            await self.collection.create_index([("op", ASCENDING), ("dead", ASCENDING), ("updated_at", ASCENDING)])
+            self._indexed = True
+
+    def _write(self, fact_id: str, fields: dict, unset: dict = None, insert_op: str = None) -> UpdateOne:
+        now = time.time()
+        update = {
+            "$set": {**fields, "updated_at": now, "next_attempt_at": now, "attempts": 0, "dead": False},
+            "$inc": {"version": 1},
+            "$setOnInsert": {"lease_until": 0.0, "created_at": now},
+        }
+        if insert_op is not None:
+            update["$setOnInsert"]["op"] = insert_op
+        if unset:
+            update["$unset"] = unset
+        return UpdateOne({"_id": fact_id}, update, upsert=True)
+
+    @instrumented("mongo", "outbox_enqueue")
+    async def _enqueue(self, writes: List[UpdateOne]):
+        await self._ensure_indexes()
+        await self.collection.bulk_write(writes, ordered=True)
+
+    async def upsert(self, points: List[Tuple[str, np.ndarray, dict]]):
+        """Insert or replace points (vector + full payload)."""
+        if not points:
+            return
+        if not self.enabled:
+            return await self._apply_now({fid: {"op": "upsert", "vector": as_float32(vec).tobytes(),
+                                                "payload": to_payload(p)} for fid, vec, p in points})
+        await self._enqueue([
+            self._write(fid, {"op": "upsert", "vector": Binary(as_float32(vec).tobytes()), "payload": to_payload(p)})
+            for fid, vec, p in points
+        ])
+
+    async def set_payload(self, updates: Dict[str, dict]):
+        """Merge {fact_id: fields} into existing points' payloads."""
+        if not updates:
+            return
+        if not self.enabled:
+            return await self._apply_now({fid: {"op": "set_payload", "payload": to_payload(f)}
+                                          for fid, f in updates.items()})
+        await self._enqueue([
+            self._write(fid, {f"payload.{k}": v for k, v in to_payload(fields).items()}, insert_op="set_payload")
+            for fid, fields in updates.items()
+        ])
+
+    async def delete(self, fact_ids: List[str]):
+        if not fact_ids:
+            return
+        if not self.enabled:
+            return await self._apply_now({fid: {"op": "delete"} for fid in fact_ids})
+        await self._enqueue([
+            self._write(fid, {"op": "delete"}, unset={"vector": "", "payload": ""}) for fid in fact_ids
+        ])
+
+    @instrumented("mongo", "outbox_pending_op")
+    async def pending_op(self, fact_id: str) -> Optional[str]:
+        """The op still queued for a fact ('upsert', 'set_payload', 'delete'), or None."""
+        if not self.enabled:
+            return None
+        rec = await self.collection.find_one({"_id": fact_id}, {"op": 1})
+        return rec.get("op") if rec else None
+
+    @instrumented("mongo", "outbox_nearest_pending")
+    async def nearest_pending(self, vectors: Sequence, min_score: float,
+                              user_ids: Sequence[Optional[str]] = None) -> List[Optional[str]]:
+        """
+        find_nearest_ids() over upserts not yet flushed to Qdrant (the most recent
+        OUTBOX_DEDUP_SCAN_LIMIT), so duplicates within one flush interval still merge.
+        Parked records are skipped: they will not reach Qdrant without intervention.
+        """
+        if not self.enabled or len(vectors) == 0:
+            return [None] * len(vectors)
+        await self._ensure_indexes()
+        cursor = self.collection.find(
+            {"op": "upsert", "dead": False},
+            {"vector": 1, "payload.status": 1, "payload.user_id": 1}
+        ).sort("updated_at", -1).limit(OUTBOX_DEDUP_SCAN_LIMIT)
+        pending = [d async for d in cursor if d.get("vector") and d.get("payload", {}).get("status") != "rejected"]
+        if not pending:
+            return [None] * len(vectors)
+        allowed = None
+        if user_ids is not None:
+            owners = [d.get("payload", {}).get("user_id") for d in pending]
+            allowed = np.array([[u is None or u == o for o in owners] for u in user_ids])
+        return nearest_ids(as_float32(np.stack(vectors)),
+                           np.stack([np.frombuffer(d["vector"], dtype=np.float32) for d in pending]),
+                           [d["_id"] for d in pending], min_score, allowed)
+
+    async def _apply_now(self, ops: Dict[str, dict]):
+        try:
+            failed = await asyncio.to_thread(apply_ops, ops)
+        except Exception:
+            logger.exception("Qdrant write failed for %d points", len(ops))
+            return
+        if failed:
+            logger.error("Qdrant write failed for %d of %d points", len(failed), len(ops))
+
+
+class OutboxFlusher:
+    """Consumer side: group-commits pending records to Qdrant from a background task."""
+
+    def __init__(self, outbox: QdrantOutbox, batch_size: int = OUTBOX_BATCH_SIZE,
+                 interval_ms: float = OUTBOX_FLUSH_INTERVAL_MS, lease_seconds: float = OUTBOX_LEASE_SECONDS,
+                 max_attempts: int = OUTBOX_MAX_ATTEMPTS):
+        self.outbox = outbox
+        self.batch_size = batch_size
+        self.interval = interval_ms / 1000.0
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._task = None
+
+    @property
+    def collection(self):
+        return self.outbox.collection
+
+    @instrumented("mongo", "outbox_claim")
+    async def _claim(self, token: str) -> List[dict]:
+        now = time.time()
+        cursor = self.collection.find(
+            {"next_attempt_at": {"$lte": now}, "lease_until": {"$lte": now}}, {"_id": 1}
+        ).sort("updated_at", ASCENDING).limit(self.batch_size)
+        ids = [d["_id"] async for d in cursor]
+        if not ids:
+            return []
+        await self.collection.update_many(
+            {"_id": {"$in": ids}, "lease_until": {"$lte": now}},
+            {"$set": {"lease_until": now + self.lease_seconds, "lease_owner": token}}
+        )
+        return await self.collection.find({"_id": {"$in": ids}, "lease_owner": token}).to_list(length=None)
+
+    @instrumented("mongo", "outbox_settle")
+    async def _settle(self, records: List[dict], failed: Dict[str, str], token: str):
+        now = time.time()
+        writes = []
+        for rec in records:
+            fid = rec["_id"]
+            if fid not in failed:
+                # only if nothing was written since the claim; otherwise flush again
+                writes.append(DeleteOne({"_id": fid, "version": rec["version"]}))
+                continue
+            attempts = rec.get("attempts", 0) + 1
+            dead = attempts >= self.max_attempts
+            if dead:
+                logger.error("Outbox record for %s parked after %d attempts: %s", fid, attempts, failed[fid])
+            writes.append(UpdateOne({"_id": fid, "version": rec["version"]}, {"$set": {
+                "attempts": attempts,
+                "dead": dead,
+                "last_error": failed[fid],
+                "next_attempt_at": float("inf") if dead else now + min(MAX_BACKOFF_SECONDS, 2 ** attempts),
+            }}))
+        if writes:
+            await self.collection.bulk_write(writes, ordered=False)
+        # release leases on records rewritten mid-flush so they go out on the next pass
+        await self.collection.update_many(
+            {"_id": {"$in": [r["_id"] for r in records]}, "lease_owner": token},
+            {"$set": {"lease_until": 0.0}, "$unset": {"lease_owner": ""}}
+        )
+
+    @timed_stage("outbox_flush")
+    async def flush_once(self) -> int:
+        """Claim, apply and settle one batch; returns the number of records processed."""
+        token = uuid.uuid4().hex
+        records = await self._claim(token)
+        if not records:
+            return 0
+        ops = {r["_id"]: r for r in records}
+        try:
+            failed = await asyncio.to_thread(apply_ops, ops)
+        except Exception as e:
+            logger.exception("Outbox flush of %d records failed", len(records))
+            failed = {fid: str(e) for fid in ops}
+        await self._settle(records, failed, token)
+        return len(records)
+
+    async def drain(self) -> int:
+        """Flush until nothing is due (tests, shutdown, one-off maintenance)."""
+        total = 0
+        while True:
+            n = await self.flush_once()
+            total += n
+            if n == 0:
+                return total
+
+    async def run(self):
+        while True:
+            try:
+                n = await self.flush_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Outbox flusher iteration failed")
+                n = 0
+            if n < self.batch_size:
+                await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start the loop on the running event loop (no-op when the outbox is disabled)."""
+        if self.outbox.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+qdrant_outbox = QdrantOutbox()
+outbox_flusher = OutboxFlusher(qdrant_outbox)
@@ -1,40 +1,234 @@
 # agno_pipeline/db/qdrant_client.py
 import asyncio
+import threading
 from qdrant_client import QdrantClient
-from qdrant_client.models import PointStruct, VectorParams, Distance
-from agno_pipeline.config import QDRANT_HOST, QDRANT_PORT, QDRANT_COLLECTION
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from qdrant_client.models import (
+    PointStruct, SetPayload, SetPayloadOperation, PointIdsList,
+    Filter, FieldCondition, MatchValue, MatchAny, Range, PayloadSchemaType, SearchRequest
+)
+from agno_pipeline.config import QDRANT_HOST, QDRANT_PORT, QDRANT_LOCATION, QDRANT_COLLECTION, QDRANT_VECTOR_DIM
+from agno_pipeline.db.vector_config import vector_params, quantization_config, storage_update, search_params, to_wire
+from agno_pipeline.metrics import instrument_methods
 
+# Fields filtered inside HNSW search; Qdrant needs a payload index on each.
+PAYLOAD_INDEXES = {
+    "status": PayloadSchemaType.KEYWORD,
+    "trust": PayloadSchemaType.FLOAT,
+    "user_id": PayloadSchemaType.KEYWORD,
+    "subject": PayloadSchemaType.KEYWORD,
+}
+
+
+def to_payload(doc: dict) -> dict:
+    """Strip Mongo-only fields (the ObjectId `_id`) from a fact document."""
+    return {k: v for k, v in doc.items() if k != "_id"}
+
+
+def build_fact_filter(status: Union[str, Sequence[str], None] = None, min_trust: float = None,
+                      user_id: str = None, subject: str = None) -> Optional[Filter]:
+    """Server-side filter for fact searches; None when nothing is constrained."""
+    must = []
+    if status is not None:
+        if isinstance(status, str):
+            must.append(FieldCondition(key="status", match=MatchValue(value=status)))
+        else:
+            must.append(FieldCondition(key="status", match=MatchAny(any=list(status))))
+    if min_trust is not None:
+        must.append(FieldCondition(key="trust", range=Range(gte=min_trust)))
+    if user_id is not None:
+        must.append(FieldCondition(key="user_id", match=MatchValue(value=user_id)))
+    if subject is not None:
+        must.append(FieldCondition(key="subject", match=MatchValue(value=subject)))
+    return Filter(must=must) if must else None
+
+
+def dedup_filter(user_id: str = None) -> Filter:
+    """Facts a new claim may merge into: never rejected ones, and only the user's own when given."""
+    must = [FieldCondition(key="user_id", match=MatchValue(value=user_id))] if user_id is not None else []
+    return Filter(must=must, must_not=[FieldCondition(key="status", match=MatchValue(value="rejected"))])
+
+
+def make_qdrant_client() -> QdrantClient:
+    if QDRANT_LOCATION == ":memory:":
+        return QdrantClient(location=QDRANT_LOCATION)
+    if QDRANT_LOCATION:
+        return QdrantClient(path=QDRANT_LOCATION)
+    return QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+
+
+@instrument_methods("qdrant")
 class QdrantDBClient:
+    """
+    Connects on first use, so importing this module never touches the network.
+    The facts collection and its payload indexes are ensured before a client is handed out;
+    if Qdrant is unreachable the calling operation fails and the next one retries.
+    """
+
     def __init__(self):
-        self.client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
-        self._ensure_collection()
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> QdrantClient:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    client = make_qdrant_client()
+                    self._ensure_collection(client)
+                    self._client = client
+        return self._client
+
+    def connect(self):
+        """Drop the current client (e.g. after fork); the next call opens a fresh one."""
+        if QDRANT_LOCATION == ":memory:":
+            return  # a new in-memory client would start empty
+        self.close()
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()  # also releases the local storage lock
+            self._client = None
+
+    def ping(self) -> bool:
+        """Readiness probe: connects (bootstrapping the collection) if needed, then round-trips."""
+        self.client.get_collections()
+        return True
 
-    def _ensure_collection(self):
-        collections = [c.name for c in self.client.get_collections().collections]
+    def _ensure_collection(self, client: QdrantClient):
+        collections = [c.name for c in client.get_collections().collections]
         if QDRANT_COLLECTION not in collections:
-            self.client.create_collection(
+            client.create_collection(
                 collection_name=QDRANT_COLLECTION,
-                vectors_config=VectorParams(size=1536, distance=Distance.COSINE)
+                vectors_config=vector_params(QDRANT_VECTOR_DIM),
+                quantization_config=quantization_config()
             )
+        else:
+            changes = storage_update(client.get_collection(QDRANT_COLLECTION))
+            if changes:
+                client.update_collection(collection_name=QDRANT_COLLECTION, **changes)
+        self._ensure_payload_indexes(client)
+
+    def _ensure_payload_indexes(self, client: QdrantClient):
+        schema = client.get_collection(QDRANT_COLLECTION).payload_schema or {}
+        for field, field_type in PAYLOAD_INDEXES.items():
+            if field not in schema:
+                client.create_payload_index(
+                    collection_name=QDRANT_COLLECTION,
+                    field_name=field,
+                    field_schema=field_type
+                )
 
     def upsert_fact(self, fact_id: str, vector: list, payload: dict):
         self.client.upsert(
             collection_name=QDRANT_COLLECTION,
-            points=[PointStruct(id=fact_id, vector=vector, payload=payload)]
+            points=[PointStruct(id=fact_id, vector=to_wire(vector), payload=to_payload(payload))]
+        )
+
+    def upsert_facts(self, points: List[Tuple[str, list, dict]]):
+        """Upsert many (fact_id, vector, payload) points in one request."""
+        if not points:
+            return
+        self.client.upsert(
+            collection_name=QDRANT_COLLECTION,
+            points=[PointStruct(id=fid, vector=to_wire(vec), payload=to_payload(p)) for fid, vec, p in points]
+        )
+
+    def set_payload(self, fact_id: str, payload: dict):
+        """Merge payload fields into an existing point without touching its vector."""
+        self.client.set_payload(
+            collection_name=QDRANT_COLLECTION,
+            payload=to_payload(payload),
+            points=[fact_id]
+        )
+
+    def existing_ids(self, fact_ids: Sequence[str]) -> set:
+        """Which of fact_ids have a point (ids only, no payload or vector)."""
+        if not fact_ids:
+            return set()
+        points = self.client.retrieve(
+            collection_name=QDRANT_COLLECTION, ids=list(fact_ids), with_payload=False, with_vectors=False
+        )
+        return {str(p.id) for p in points}
+
+    def set_payload_batch(self, updates: Dict[str, dict]):
+        """Apply many {fact_id: payload} updates in a single batch request."""
+        if not updates:
+            return
+        self.client.batch_update_points(
+            collection_name=QDRANT_COLLECTION,
+            update_operations=[
+                SetPayloadOperation(set_payload=SetPayload(payload=to_payload(p), points=[fid]))
+                for fid, p in updates.items()
+            ]
         )
 
     def query_vector(self, vector: list, top_k: int = 10):
         results = self.client.search(
             collection_name=QDRANT_COLLECTION,
             query_vector=vector,
+            search_params=search_params(),
             limit=top_k
         )
         return results
 
+    def search_facts(self, vector: list, top_k: int = 10, status: Union[str, Sequence[str], None] = None,
+                     min_trust: float = None, user_id: str = None, subject: str = None,
+                     payload_fields: Sequence[str] = None):
+        """
+        Filtered search: constraints are applied inside HNSW, and only payload_fields
+        (all fields when None) are returned.
+        """
+        return self.client.search(
+            collection_name=QDRANT_COLLECTION,
+            query_vector=vector,
+            query_filter=build_fact_filter(status, min_trust, user_id, subject),
+            search_params=search_params(),
+            limit=top_k,
+            with_payload=list(payload_fields) if payload_fields is not None else True
+        )
+
+    def find_nearest_ids(self, vectors: Sequence, min_score: float,
+                         user_ids: Sequence[Optional[str]] = None) -> List[Optional[str]]:
+        """
+        Best mergeable match per vector at or above min_score (one search_batch request),
+        else None. See dedup_filter; user_ids scopes each vector to that user's facts.
+        """
+        if len(vectors) == 0:
+            return []
+        user_ids = user_ids if user_ids is not None else [None] * len(vectors)
+        results = self.client.search_batch(
+            collection_name=QDRANT_COLLECTION,
+            requests=[
+                SearchRequest(vector=to_wire(v), filter=dedup_filter(u), limit=1, score_threshold=min_score,
+                              params=search_params(), with_payload=False)
+                for v, u in zip(vectors, user_ids)
+            ]
+        )
+        return [str(hits[0].id) if hits else None for hits in results]
+
+    def collection_stats(self) -> dict:
+        info = self.client.get_collection(QDRANT_COLLECTION)
+        return {
+            "status": str(getattr(info.status, "value", info.status)),
+            "points_count": info.points_count,
+            "indexed_vectors_count": info.indexed_vectors_count,
+            "segments_count": info.segments_count,
+        }
+
+    def delete_facts(self, fact_ids: List[str]):
+        """Delete many points by id in one request."""
+        if fact_ids:
+            self.client.delete(
+                collection_name=QDRANT_COLLECTION,
+                points_selector=PointIdsList(points=list(fact_ids))
+            )
+
     def delete_by_filter(self, filter_):
         self.client.delete(collection_name=QDRANT_COLLECTION, points_selector=filter_)
 
-# Singleton instance
+# Singleton instance (lazy: no connection until first use)
 qdrant_client = QdrantDBClient()
 
 # Helper for sync Celery tasks
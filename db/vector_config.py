@@ -0,0 +1,71 @@
+# agno_pipeline/db/vector_config.py
+"""
+Collection vector settings shared by the runtime client and data_import.
+
+Quantized vectors live in RAM for the HNSW search, originals stay on disk and
+are only read to rescore the oversampled candidates.
+"""
+import numpy as np
+from qdrant_client.models import (
+    VectorParams,
+    VectorParamsDiff,
+    Distance,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    SearchParams,
+    QuantizationSearchParams,
+)
+from agno_pipeline.config import QDRANT_QUANTIZATION, QDRANT_ON_DISK, QDRANT_OVERSAMPLING
+
+
+def vector_params(dim: int) -> VectorParams:
+    return VectorParams(size=dim, distance=Distance.COSINE, on_disk=QDRANT_ON_DISK)
+
+
+def quantization_config(mode: str = QDRANT_QUANTIZATION):
+    """"scalar" (int8, ~4x smaller), "binary" (1 bit, ~32x smaller) or None for "none"."""
+    if mode == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if mode == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def storage_update(info) -> dict:
+    """
+    update_collection() kwargs that move an existing collection (its CollectionInfo) to the
+    configured storage: originals on disk plus the quantized copy. Empty if already there.
+    Quantizing without moving the originals would only add a copy to RAM.
+    """
+    changes = {}
+    quantization = quantization_config()
+    if quantization is not None and info.config.quantization_config is None:
+        changes["quantization_config"] = quantization
+    vectors = info.config.params.vectors
+    if QDRANT_ON_DISK and isinstance(vectors, VectorParams) and not vectors.on_disk:
+        changes["vectors_config"] = {"": VectorParamsDiff(on_disk=True)}
+    return changes
+
+
+def search_params(mode: str = QDRANT_QUANTIZATION):
+    """Rescore quantized candidates against the on-disk originals."""
+    if quantization_config(mode) is None:
+        return None
+    return SearchParams(
+        quantization=QuantizationSearchParams(rescore=True, oversampling=QDRANT_OVERSAMPLING)
+    )
+
+
+def as_float32(vec) -> np.ndarray:
+    """Contiguous float32 vector (or matrix) from any array-like."""
+    return np.ascontiguousarray(vec, dtype=np.float32)
+
+
+def to_wire(vec) -> list:
+    """Vectors only become Python lists at the Qdrant request boundary."""
+    return vec.tolist() if isinstance(vec, np.ndarray) else list(vec)
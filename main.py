@@ -1,23 +1,29 @@
 # agno_pipeline/main.py
+import asyncio
+import json
 import time
 import logging
-from fastapi import FastAPI
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, Header
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from collections import Counter
+from typing import List, Dict, Any, Optional
 
-from agno_pipeline.tasks.pipeline_tasks import (
-    ingest_claims_task, verify_claim_task, score_claim_task,
-    admit_claim_task, prune_facts_task
+from agno_pipeline.config import READY_TIMEOUT_SECONDS
+from agno_pipeline.tasks.signatures import (
+    enqueue, INGEST_CLAIMS, INGEST_BULK, FUSED_PIPELINE, VERIFY_CLAIM, SCORE_CLAIM, ADMIT_CLAIM, PRUNE_FACTS
 )
-from agno_pipeline.agents.query_time import retrieve_and_answer
+from agno_pipeline.tasks.admission import ingest_admission, content_key, Rejected, RequestTooLarge, PENDING
+from agno_pipeline.agents.query_time import retrieve_and_answer, prepare_answer, stream_prepared
 from agno_pipeline.db.mongo_client import mongo_client
 from agno_pipeline.db.qdrant_client import qdrant_client
+from agno_pipeline.db.bootstrap import bootstrap_stores
+from agno_pipeline.metrics import render_metrics, ADMISSION_DECISIONS
 
 logger = logging.getLogger("agno_main")
 logger.setLevel(logging.INFO)
 
-app = FastAPI(title="Agno Multi-Agent Autonomous Pipeline")
-
 # ----------- API Schemas -----------
 class IngestPayload(BaseModel):
     user_id: str
@@ -25,52 +31,192 @@ class IngestPayload(BaseModel):
     text: str
     tools: List[Dict[str, Any]] = None
     timestamp: float = None
+    # run verify/score/admit in the same task, carrying each fact in memory
+    fused: bool = False
+
+class BulkIngestPayload(BaseModel):
+    items: List[IngestPayload]
 
 class QueryPayload(BaseModel):
     user_id: str
     session_id: str
     query: str
     top_k: int = 8
+    stream: bool = False
 
 class FactIDPayload(BaseModel):
     fact_id: str
 
+# ----------- Lifecycle -----------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # bootstrap in the background: the API serves (and reports not-ready) while the stores come up
+    bootstrap = asyncio.create_task(bootstrap_stores())
+    app.state.bootstrap = bootstrap
+    try:
+        yield
+    finally:
+        bootstrap.cancel()
+        with suppress(asyncio.CancelledError):
+            await bootstrap
+        mongo_client.close()
+        qdrant_client.close()
+        ingest_admission.close()
+
+app = FastAPI(title="Agno Multi-Agent Autonomous Pipeline", lifespan=lifespan)
+
+@app.get("/healthz")
+def api_healthz():
+    """Liveness: the process is up; does not touch any dependency."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def api_readyz():
+    """Readiness: Mongo and Qdrant answer within READY_TIMEOUT_SECONDS."""
+    async def check(coro):
+        try:
+            await asyncio.wait_for(coro, READY_TIMEOUT_SECONDS)
+            return "ok"
+        except Exception as e:
+            return f"error: {e!r}"
+
+    mongo, qdrant = await asyncio.gather(
+        check(mongo_client.ping()),
+        check(asyncio.to_thread(qdrant_client.ping)),
+    )
+    ready = mongo == "ok" and qdrant == "ok"
+    return JSONResponse({"ready": ready, "mongo": mongo, "qdrant": qdrant}, status_code=200 if ready else 503)
+
 # ----------- Endpoints -----------
+def too_many_requests(endpoint: str, rejected: Rejected) -> JSONResponse:
+    ADMISSION_DECISIONS.labels(endpoint, rejected.reason).inc()
+    return JSONResponse({"status": "rejected", "reason": rejected.reason, "retry_after": rejected.retry_after},
+                        status_code=429, headers={"Retry-After": rejected.retry_after_header})
+
 @app.post("/ingest")
-def api_ingest(payload: IngestPayload):
-    payload.timestamp = payload.timestamp or time.time()
-    task = ingest_claims_task.delay(payload.dict())
+def api_ingest(payload: IngestPayload, idempotency_key: Optional[str] = Header(None)):
+    """
+    Enqueue extraction once per idempotency key (Idempotency-Key header, else a hash of
+    user/session/text); replays get the original task id. 429 + Retry-After when the
+    tenant is over its rate or the ingest queue is backed up.
+    """
+    task_name = FUSED_PIPELINE if payload.fused else INGEST_CLAIMS
+    if idempotency_key:
+        key = f"k:{payload.user_id}:{idempotency_key}"
+    else:
+        key = content_key(payload.user_id, payload.session_id, payload.text, payload.fused)
+    prior = ingest_admission.claim(key)
+    if prior is not None:
+        ADMISSION_DECISIONS.labels("ingest", "duplicate").inc()
+        return {"status": "duplicate", "task_id": None if prior == PENDING else prior}
+    try:
+        ingest_admission.admit({payload.user_id: 1}, task_name)
+        payload.timestamp = payload.timestamp or time.time()
+        task = enqueue(task_name, payload.dict())
+    except Rejected as rejected:
+        ingest_admission.release(key)
+        return too_many_requests("ingest", rejected)
+    except Exception:
+        ingest_admission.release(key)
+        raise
+    ingest_admission.record(task.id, key)
+    ADMISSION_DECISIONS.labels("ingest", "accepted").inc()
     return {"status": "accepted", "task_id": task.id}
 
+@app.post("/ingest/bulk")
+def api_ingest_bulk(payload: BulkIngestPayload):
+    """
+    Items already ingested within the dedup window are dropped; each user is charged one
+    token per fresh item of theirs. 413 if one user's items exceed INGEST_RATE_BURST.
+    """
+    try:
+        ingest_admission.check_size(Counter(i.user_id for i in payload.items))
+    except RequestTooLarge as e:
+        ADMISSION_DECISIONS.labels("ingest_bulk", "too_large").inc()
+        return JSONResponse({"status": "rejected", "reason": "too_large", "error": str(e),
+                             "max_items_per_user": e.limit}, status_code=413)
+    keys = [content_key(i.user_id, i.session_id, i.text, i.fused) for i in payload.items]
+    prior = ingest_admission.claim_many(keys)
+    fresh = [(item, key) for item, key, p in zip(payload.items, keys, prior) if p is None]
+    duplicates = len(payload.items) - len(fresh)
+    if duplicates:
+        ADMISSION_DECISIONS.labels("ingest_bulk", "duplicate").inc(duplicates)
+    if not fresh:
+        return {"status": "duplicate", "task_id": None, "items": 0, "duplicates": duplicates}
+    fresh_keys = [key for _, key in fresh]
+    try:
+        ingest_admission.admit(Counter(item.user_id for item, _ in fresh), INGEST_BULK)
+        now = time.time()
+        for item, _ in fresh:
+            item.timestamp = item.timestamp or now
+        task = enqueue(INGEST_BULK, {"items": [item.dict() for item, _ in fresh]})
+    except Rejected as rejected:
+        ingest_admission.release(*fresh_keys)
+        return too_many_requests("ingest_bulk", rejected)
+    except Exception:
+        ingest_admission.release(*fresh_keys)
+        raise
+    ingest_admission.record(task.id, *fresh_keys)
+    ADMISSION_DECISIONS.labels("ingest_bulk", "accepted").inc(len(fresh))
+    return {"status": "accepted", "task_id": task.id, "items": len(fresh), "duplicates": duplicates}
+
 @app.post("/verify")
 def api_verify(payload: FactIDPayload):
-    task = verify_claim_task.delay(payload.dict())
+    task = enqueue(VERIFY_CLAIM, payload.dict())
     return {"status": "accepted", "task_id": task.id}
 
 @app.post("/score")
 def api_score(payload: FactIDPayload):
-    task = score_claim_task.delay(payload.dict())
+    task = enqueue(SCORE_CLAIM, payload.dict())
     return {"status": "accepted", "task_id": task.id}
 
 @app.post("/admit")
 def api_admit(payload: FactIDPayload):
-    task = admit_claim_task.delay(payload.dict())
+    task = enqueue(ADMIT_CLAIM, payload.dict())
     return {"status": "accepted", "task_id": task.id}
 
 @app.post("/prune")
 def api_prune():
-    task = prune_facts_task.delay({})
+    task = enqueue(PRUNE_FACTS, {})
     return {"status": "prune_scheduled", "task_id": task.id}
 
 @app.post("/query")
 async def api_query(payload: QueryPayload):
-    result = await retrieve_and_answer(payload.query, payload.top_k)
+    if payload.stream:
+        # retrieval runs before the 200 headers go out, so its failures are plain HTTP errors;
+        # NDJSON: used_facts first, then one line per generated token chunk
+        prep = await prepare_answer(payload.query, payload.top_k, payload.user_id)
+
+        async def events():
+            async for event in stream_prepared(prep):
+                yield json.dumps(event) + "\n"
+        return StreamingResponse(events(), media_type="application/x-ndjson")
+    result = await retrieve_and_answer(payload.query, payload.top_k, payload.user_id)
     return result
 
+@app.get("/metrics")
+def api_metrics():
+    """Prometheus scrape endpoint: stage, external-call and cache metrics for this API process."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 @app.get("/admin/stats")
 async def api_stats():
-    facts_count = len(await mongo_client.get_all_facts())
+    """O(1) stats from collection metadata; a failing store is reported, not raised."""
+    mongo_stats, qdrant_stats = await asyncio.gather(
+        mongo_client.fact_stats(),
+        asyncio.to_thread(qdrant_client.collection_stats),
+        return_exceptions=True,
+    )
+    if isinstance(mongo_stats, Exception):
+        logger.error("Mongo stats failed: %s", mongo_stats)
+        mongo_stats = {"error": str(mongo_stats)}
+    if isinstance(qdrant_stats, Exception):
+        logger.error("Qdrant stats failed: %s", qdrant_stats)
+        qdrant_stats = {"error": str(qdrant_stats)}
     return {
-        "mongo_facts": facts_count,
-        "qdrant_points": len(qdrant_client.query_vector([0]*1536, 1))  # just a ping
+        "mongo_facts": mongo_stats.get("count"),
+        "qdrant_points": qdrant_stats.get("points_count"),
+        "mongo": mongo_stats,
+        "qdrant": qdrant_stats,
     }
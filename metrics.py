@@ -0,0 +1,154 @@
+# agno_pipeline/metrics.py
+"""
+Prometheus instrumentation shared by the API and the Celery workers.
+
+  - external calls (TEI, vLLM, Serper, Mongo, Qdrant): `instrumented(service, op)`
+    or `instrument_methods(service)` on a client class
+  - agent stages (ingest, verify, score, admit, prune, query): `timed_stage(name)`
+  - Celery task run time: recorded from task_prerun/task_postrun (tasks/runtime.py)
+
+Each call records a latency histogram, an error counter and an in-flight gauge;
+children are resolved once at decoration time so the hot path is a few counter
+updates. With PROMETHEUS_MULTIPROC_DIR set (gunicorn/uvicorn workers, Celery prefork)
+values are aggregated across processes when rendered.
+"""
+import functools
+import inspect
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+LATENCY_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+CALL_LATENCY = Histogram("agno_external_call_seconds", "External call latency",
+                         ["service", "op"], buckets=LATENCY_BUCKETS)
+CALL_ERRORS = Counter("agno_external_call_errors_total", "External calls that raised", ["service", "op"])
+CALL_IN_FLIGHT = Gauge("agno_external_calls_in_flight", "External calls in progress",
+                       ["service", "op"], multiprocess_mode="livesum")
+
+STAGE_LATENCY = Histogram("agno_stage_seconds", "Agent stage latency", ["stage"], buckets=LATENCY_BUCKETS)
+STAGE_ERRORS = Counter("agno_stage_errors_total", "Agent stages that raised", ["stage"])
+STAGE_IN_FLIGHT = Gauge("agno_stages_in_flight", "Agent stages in progress", ["stage"], multiprocess_mode="livesum")
+
+TASK_LATENCY = Histogram("agno_task_seconds", "Celery task run time", ["task", "state"], buckets=LATENCY_BUCKETS)
+TASK_IN_FLIGHT = Gauge("agno_tasks_in_flight", "Celery tasks executing", ["task"], multiprocess_mode="livesum")
+
+CACHE_REQUESTS = Counter("agno_cache_requests_total", "Cache lookups", ["cache", "result"])
+ADMISSION_DECISIONS = Counter("agno_ingest_admission_total", "Ingest admission decisions",
+                              ["endpoint", "decision"])
+
+
+def _wrap(fn, latency, errors, in_flight):
+    if inspect.isasyncgenfunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            in_flight.inc()
+            start = time.perf_counter()
+            try:
+                async for item in fn(*args, **kwargs):
+                    yield item
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                latency.observe(time.perf_counter() - start)
+                in_flight.dec()
+    elif inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            in_flight.inc()
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                latency.observe(time.perf_counter() - start)
+                in_flight.dec()
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            in_flight.inc()
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                latency.observe(time.perf_counter() - start)
+                in_flight.dec()
+    return wrapper
+
+
+def instrumented(service: str, op: str):
+    """Decorator for one external call (sync, async or async generator)."""
+    def decorate(fn):
+        return _wrap(fn, CALL_LATENCY.labels(service, op), CALL_ERRORS.labels(service, op),
+                     CALL_IN_FLIGHT.labels(service, op))
+    return decorate
+
+
+def instrument_methods(service: str, skip=("connect", "close")):
+    """Class decorator: instrument every public method as op=<method name>."""
+    def decorate(cls):
+        for name, fn in list(vars(cls).items()):
+            if name.startswith("_") or name in skip or not inspect.isfunction(fn):
+                continue
+            setattr(cls, name, instrumented(service, name)(fn))
+        return cls
+    return decorate
+
+
+def timed_stage(stage: str):
+    """Decorator for an agent stage."""
+    def decorate(fn):
+        return _wrap(fn, STAGE_LATENCY.labels(stage), STAGE_ERRORS.labels(stage), STAGE_IN_FLIGHT.labels(stage))
+    return decorate
+
+
+def count_cache(cache: str, hits: int, misses: int):
+    if hits:
+        CACHE_REQUESTS.labels(cache, "hit").inc(hits)
+    if misses:
+        CACHE_REQUESTS.labels(cache, "miss").inc(misses)
+
+
+def multiprocess_enabled() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def metrics_registry():
+    """Per-process registry, or one aggregating every process under PROMETHEUS_MULTIPROC_DIR."""
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics():
+    """(body, content_type) in the Prometheus text format."""
+    return generate_latest(metrics_registry()), CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port: int):
+    start_http_server(port, registry=metrics_registry())
+
+
+def mark_process_dead(pid: int):
+    """Drop a dead worker's live gauges from the multiprocess aggregate."""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,73 @@
+# agno_pipeline/models/batching.py
+import abc
+import asyncio
+from typing import Any, List, Sequence
+
+
+class MicroBatcher(abc.ABC):
+    """
+    Merges concurrent submit() calls into one run_batch() call per batch.
+    A batch is flushed when it reaches max_batch_size or after max_wait_ms,
+    whichever comes first; each caller awaits its own future.
+    Subclasses implement run_batch(items) -> one result per item, in order.
+    """
+
+    def __init__(self, max_batch_size: int, max_wait_ms: float):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self._loop = None
+        self._pending = []
+        self._timer = None
+        self._tasks = set()  # in-flight batches; the loop only keeps weak references
+
+    @abc.abstractmethod
+    async def run_batch(self, items: List[Any]) -> Sequence[Any]:
+        """One result per item, in order."""
+
+    def _bind_loop(self):
+        # futures and timers belong to one event loop; state from another loop
+        # (a closed test/bench loop, a different thread's loop) is not reusable
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._pending = []
+            self._timer = None
+            self._tasks = set()
+        return loop
+
+    async def submit(self, item: Any) -> Any:
+        loop = self._bind_loop()
+        fut = loop.create_future()
+        self._pending.append((item, fut))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await fut
+
+    async def submit_many(self, items: List[Any]) -> List[Any]:
+        return list(await asyncio.gather(*(self.submit(item) for item in items)))
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        for i in range(0, len(batch), self.max_batch_size):
+            task = self._loop.create_task(self._run(batch[i:i + self.max_batch_size]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        try:
+            results = await self.run_batch([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"{type(self).__name__} got {len(results)} results for {len(batch)} inputs")
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
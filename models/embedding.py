@@ -1,18 +1,80 @@
 # agno_pipeline/models/embedding.py
+import numpy as np
 import requests
-from agno_pipeline.config import TEI_EMBEDDING_URL
+from typing import List
+from agno_pipeline.config import TEI_EMBEDDING_URL, EMBED_BATCH_SIZE, EMBED_BATCH_WAIT_MS
+from agno_pipeline.models.http_client import get_http_client
+from agno_pipeline.models.batching import MicroBatcher
+from agno_pipeline.db.vector_config import as_float32
+from agno_pipeline.metrics import instrumented
+
+
+def _parse_embeddings(data) -> np.ndarray:
+    """
+    TEI returns a bare list of vectors; older deployments wrap it in {"embedding": ...}.
+    Returned as one (n, dim) float32 matrix; rows are the per-text vectors.
+    """
+    if isinstance(data, dict):
+        data = data.get("embeddings", data.get("embedding"))
+    if data and not isinstance(data[0], list):
+        data = [data]
+    return as_float32(data)
+
 
 class TEIEmbeddingClient:
     def __init__(self, base_url: str = TEI_EMBEDDING_URL):
         self.base_url = base_url.rstrip("/")
 
-    def embed(self, text: str) -> list:
+    @instrumented("tei_embed", "embed")
+    def embed(self, text: str) -> np.ndarray:
         """Send a text to the TEI embedding server and return vector."""
         resp = requests.post(
             f"{self.base_url}/embed",
             json={"inputs": text}
         )
         resp.raise_for_status()
-        return resp.json()["embedding"]
+        return _parse_embeddings(resp.json())[0]
+
+
+class AsyncTEIEmbeddingClient:
+    """Native async TEI embedding client on the shared pooled HTTP client."""
+
+    def __init__(self, base_url: str = TEI_EMBEDDING_URL):
+        self.base_url = base_url.rstrip("/")
+
+    async def embed(self, text: str) -> np.ndarray:
+        return (await self.embed_batch([text]))[0]
+
+    @instrumented("tei_embed", "embed_batch")
+    async def embed_batch(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return as_float32(np.empty((0, 0)))
+        resp = await get_http_client().post(
+            f"{self.base_url}/embed",
+            json={"inputs": texts}
+        )
+        resp.raise_for_status()
+        return _parse_embeddings(resp.json())
+
+
+class EmbeddingBatcher(MicroBatcher):
+    """Merges concurrent embed() calls into a single TEI request."""
+
+    def __init__(self, client: AsyncTEIEmbeddingClient, max_batch_size: int = EMBED_BATCH_SIZE,
+                 max_wait_ms: float = EMBED_BATCH_WAIT_MS):
+        super().__init__(max_batch_size, max_wait_ms)
+        self.client = client
+
+    async def run_batch(self, texts: List[str]) -> np.ndarray:
+        return await self.client.embed_batch(texts)
+
+    async def embed(self, text: str) -> np.ndarray:
+        return await self.submit(text)
+
+    async def embed_batch(self, texts: List[str]) -> List[np.ndarray]:
+        return await self.submit_many(texts)
+
 
 embedding_client = TEIEmbeddingClient()
+async_embedding_client = AsyncTEIEmbeddingClient()
+embedding_batcher = EmbeddingBatcher(async_embedding_client)
@@ -0,0 +1,162 @@
+# agno_pipeline/models/embedding_cache.py
+import datetime
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from bson import Binary
+from pymongo import UpdateOne
+
+from agno_pipeline.config import (
+    TEI_EMBEDDING_MODEL,
+    EMBED_CACHE_SIZE,
+    EMBED_CACHE_PERSIST,
+    EMBED_CACHE_COLLECTION,
+    EMBED_CACHE_TTL_SECONDS,
+)
+from agno_pipeline.db.mongo_client import mongo_client
+from agno_pipeline.db.vector_config import as_float32
+from agno_pipeline.models.embedding import embedding_batcher
+from agno_pipeline.metrics import instrumented, count_cache
+
+logger = logging.getLogger("embedding_cache")
+logger.setLevel(logging.INFO)
+
+
+def cache_key(model_id: str, text: str) -> str:
+    """Content address of an embedding: sha256 over model id and exact text."""
+    return hashlib.sha256(f"{model_id}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class LRUStore:
+    """Bounded in-process tier; with a ttl (seconds) entries also expire."""
+
+    def __init__(self, max_items: int = EMBED_CACHE_SIZE, ttl: float = None):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at or None, value)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] <= time.time():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: str, value: Any):
+        if self.max_items <= 0:
+            return
+        self._data[key] = (time.time() + self.ttl if self.ttl is not None else None, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_items:
+            self._data.popitem(last=False)
+
+
+class MongoEmbeddingStore:
+    """
+    Persistent tier shared by every API and worker process; vectors are raw float32 bytes.
+    A TTL index on stored_at drops entries ttl seconds after they were written, so
+    one-off texts (most user queries) do not accumulate forever.
+    """
+
+    def __init__(self, collection_name: str = EMBED_CACHE_COLLECTION, ttl: float = EMBED_CACHE_TTL_SECONDS):
+        self.collection_name = collection_name
+        self.ttl = ttl
+        self._indexed = False
+
+    @property
+    def collection(self):
+        return mongo_client.db[self.collection_name]
+
+    @instrumented("mongo", "embedding_cache_get")
+    async def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        cursor = self.collection.find({"_id": {"$in": keys}}, {"vector": 1})
+        return {d["_id"]: self._decode(d["vector"]) async for d in cursor}
+
+    @instrumented("mongo", "embedding_cache_put")
+    async def put_many(self, items: Dict[str, np.ndarray]):
+        if not items:
+            return
+        if not self._indexed:
+            await self.collection.create_index("stored_at", expireAfterSeconds=int(self.ttl))
+            self._indexed = True
+        now = datetime.datetime.utcnow()
+        ops = [
+            UpdateOne({"_id": k}, {"$setOnInsert": {"vector": Binary(as_float32(v).tobytes()), "stored_at": now}},
+                      upsert=True)
+            for k, v in items.items()
+        ]
+        await self.collection.bulk_write(ops, ordered=False)
+
+    @staticmethod
+    def _decode(stored) -> np.ndarray:
+        # entries written before float32 storage hold plain lists
+        if isinstance(stored, (bytes, Binary)):
+            return np.frombuffer(stored, dtype=np.float32)
+        return as_float32(stored)
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache in front of the TEI micro-batcher.
+    Lookup order: LRU -> persistent tier -> TEI; misses are written back to both tiers.
+    Persistent-tier failures are logged and never fail the embed call.
+    """
+
+    def __init__(self, embedder, model_id: str = TEI_EMBEDDING_MODEL,
+                 lru: LRUStore = None, persistent: MongoEmbeddingStore = None):
+        self.embedder = embedder
+        self.model_id = model_id
+        self.lru = lru or LRUStore()
+        self.persistent = persistent
+
+    async def embed(self, text: str) -> np.ndarray:
+        return (await self.embed_batch([text]))[0]
+
+    async def embed_batch(self, texts: List[str]) -> List[np.ndarray]:
+        keys = [cache_key(self.model_id, t) for t in texts]
+        found = {}
+        for k in keys:
+            vec = self.lru.get(k)
+            if vec is not None:
+                found[k] = vec
+
+        missing = list(dict.fromkeys(k for k in keys if k not in found))
+        if missing and self.persistent is not None:
+            try:
+                stored = await self.persistent.get_many(missing)
+            except Exception:
+                logger.exception("Embedding cache read failed")
+                stored = {}
+            for k, vec in stored.items():
+                self.lru.put(k, vec)
+            found.update(stored)
+            missing = [k for k in missing if k not in found]
+
+        count_cache("embedding", len(keys) - len(missing), len(missing))
+        if missing:
+            text_by_key = dict(zip(keys, texts))
+            vectors = await self.embedder.embed_batch([text_by_key[k] for k in missing])
+            fresh = dict(zip(missing, vectors))
+            for k, vec in fresh.items():
+                self.lru.put(k, vec)
+            found.update(fresh)
+            if self.persistent is not None:
+                try:
+                    await self.persistent.put_many(fresh)
+                except Exception:
+                    logger.exception("Embedding cache write failed")
+
+        return [found[k] for k in keys]
+
+
+embedding_cache = EmbeddingCache(
+    embedding_batcher,
+    persistent=MongoEmbeddingStore() if EMBED_CACHE_PERSIST == "mongo" else None,
+)
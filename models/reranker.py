@@ -1,11 +1,50 @@
 # agno_pipeline/models/reranker.py
+import asyncio
 import requests
-from agno_pipeline.config import TEI_RERANKER_URL
+from typing import List
+from agno_pipeline.config import TEI_RERANKER_URL, RERANK_MAX_BATCH_TOKENS, RERANK_MAX_BATCH_SIZE
+from agno_pipeline.models.http_client import get_http_client
+from agno_pipeline.metrics import instrumented
+
+
+def approx_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars per token) used for request sizing."""
+    return len(text) // 4 + 1
+
+
+def chunk_documents(query: str, documents: List[str], max_batch_tokens: int = RERANK_MAX_BATCH_TOKENS,
+                    max_batch_size: int = RERANK_MAX_BATCH_SIZE) -> List[List[int]]:
+    """Split document indices into chunks whose (query + doc) pairs fit TEI's max-batch-tokens."""
+    query_tokens = approx_tokens(query)
+    chunks, current, budget = [], [], 0
+    for i, doc in enumerate(documents):
+        cost = query_tokens + approx_tokens(doc)
+        if current and (budget + cost > max_batch_tokens or len(current) >= max_batch_size):
+            chunks.append(current)
+            current, budget = [], 0
+        current.append(i)
+        budget += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _parse_scores(data, n: int) -> List[float]:
+    """TEI returns [{"index", "score"}, ...] sorted by score; older deployments return {"scores": [...]}."""
+    if isinstance(data, dict):
+        scores = list(data.get("scores", []))
+        return scores + [0.0] * (n - len(scores))
+    scores = [0.0] * n
+    for item in data:
+        scores[item["index"]] = item["score"]
+    return scores
+
 
 class TEIRerankerClient:
     def __init__(self, base_url: str = TEI_RERANKER_URL):
         self.base_url = base_url.rstrip("/")
 
+    @instrumented("tei_rerank", "score")
     def score(self, query: str, document: str) -> float:
         """Send query+doc to TEI reranker server and return score."""
         resp = requests.post(
@@ -13,7 +52,34 @@ class TEIRerankerClient:
             json={"query": query, "documents": [document]}
         )
         resp.raise_for_status()
-        scores = resp.json()["scores"]
-        return scores[0] if scores else 0.0
+        return _parse_scores(resp.json(), 1)[0]
+
+
+class AsyncTEIRerankerClient:
+    """Native async TEI reranker client on the shared pooled HTTP client."""
+
+    def __init__(self, base_url: str = TEI_RERANKER_URL):
+        self.base_url = base_url.rstrip("/")
+
+    async def score(self, query: str, document: str) -> float:
+        return (await self.score_many(query, [document]))[0]
+
+    @instrumented("tei_rerank", "score_many")
+    async def score_many(self, query: str, documents: List[str]) -> List[float]:
+        """Rerank a whole candidate list; chunks are sent concurrently."""
+        scores = [0.0] * len(documents)
+
+        async def run_chunk(idx: List[int]):
+            resp = await get_http_client().post(
+                f"{self.base_url}/rerank",
+                json={"query": query, "documents": [documents[i] for i in idx]}
+            )
+            resp.raise_for_status()
+            for i, s in zip(idx, _parse_scores(resp.json(), len(idx))):
+                scores[i] = s
+
+        await asyncio.gather(*(run_chunk(idx) for idx in chunk_documents(query, documents)))
+        return scores
 
 reranker_client = TEIRerankerClient()
+async_reranker_client = AsyncTEIRerankerClient()
@@ -1,10 +1,66 @@
 # agno_pipeline/models/vllm_client.py
+import json
+import math
 import requests
+from typing import AsyncIterator, List, Tuple
+from agno_pipeline.config import (
+    VLLM_URL, VLLM_COMPLETIONS_URL, VLLM_MODEL, ENTAIL_BATCH_SIZE, ENTAIL_BATCH_WAIT_MS, ENTAIL_TOP_LOGPROBS
+)
+from agno_pipeline.models.http_client import get_http_client
+from agno_pipeline.models.batching import MicroBatcher
+from agno_pipeline.metrics import instrumented
+
+
+def entailment_prompt(claim: str, snippet: str) -> str:
+    return (
+        "Does the snippet support the claim? Answer Yes or No.\n\n"
+        f"Claim: {claim}\n\nSnippet: {snippet}\n\nAnswer:"
+    )
+
+
+def _entailment_request(pairs: List[Tuple[str, str]]) -> dict:
+    """One /v1/completions body: a prompt per pair, a single greedy token with its top logprobs."""
+    body = {
+        "prompt": [entailment_prompt(c, s) for c, s in pairs],
+        "max_tokens": 1,
+        "temperature": 0.0,
+        "logprobs": ENTAIL_TOP_LOGPROBS,
+    }
+    if VLLM_MODEL:
+        body["model"] = VLLM_MODEL
+    return body
+
+
+def _answer_prob(top_logprobs: dict) -> float:
+    """P(yes) / (P(yes) + P(no)) over the answer token's top-k; 0.5 if neither is there."""
+    p_yes = p_no = 0.0
+    for token, logprob in (top_logprobs or {}).items():
+        word = token.strip().strip(".,:").lower()
+        if word == "yes":
+            p_yes += math.exp(logprob)
+        elif word == "no":
+            p_no += math.exp(logprob)
+    if p_yes + p_no == 0.0:
+        return 0.5
+    return p_yes / (p_yes + p_no)
+
+
+def _parse_entailment(data: dict, n: int) -> List[float]:
+    choices = sorted(data["choices"], key=lambda c: c.get("index", 0))
+    if len(choices) != n:
+        raise RuntimeError(f"vLLM returned {len(choices)} completions for {n} prompts")
+    probs = []
+    for choice in choices:
+        top = (choice.get("logprobs") or {}).get("top_logprobs") or [{}]
+        probs.append(_answer_prob(top[0]))
+    return probs
+
 
 class VLLMClient:
     def __init__(self, base_url: str):
         self.base_url = base_url.rstrip("/")
 
+    @instrumented("vllm", "generate")
     def generate(self, prompt: str, max_tokens: int = 512) -> str:
         """Call vLLM text generation endpoint."""
         resp = requests.post(
@@ -19,4 +75,86 @@ class VLLMClient:
         prompt = f"Extract structured claims from: {text}"
         return [{"natural_text": text, "subject": "X", "predicate": "is", "object": "Y"}]
 
-vllm_client = None  # To be instantiated in config or app startup
+
+class AsyncVLLMClient:
+    """Native async vLLM client on the shared pooled HTTP client."""
+
+    def __init__(self, base_url: str, completions_url: str = VLLM_COMPLETIONS_URL):
+        self.base_url = base_url.rstrip("/")
+        self.completions_url = completions_url.rstrip("/")
+
+    @instrumented("vllm", "generate")
+    async def generate(self, prompt: str, max_tokens: int = 512) -> str:
+        resp = await get_http_client().post(
+            f"{self.base_url}/generate",
+            json={"prompt": prompt, "max_tokens": max_tokens}
+        )
+        resp.raise_for_status()
+        return resp.json()["text"]
+
+    @instrumented("vllm", "generate_stream")
+    async def generate_stream(self, prompt: str, max_tokens: int = 512) -> AsyncIterator[str]:
+        """
+        Stream a completion from vLLM's /generate (stream=True), yielding text deltas.
+        The server sends NUL-delimited JSON chunks holding the cumulative text.
+        """
+        sent = ""
+        buf = ""
+        async with get_http_client().stream(
+            "POST",
+            f"{self.base_url}/generate",
+            json={"prompt": prompt, "max_tokens": max_tokens, "stream": True}
+        ) as resp:
+            resp.raise_for_status()
+            async for chunk in resp.aiter_text():
+                buf += chunk
+                *parts, buf = buf.split("\0")
+                for part in parts:
+                    if not part.strip():
+                        continue
+                    text = json.loads(part)["text"]
+                    if isinstance(text, list):
+                        text = text[0] if text else ""
+                    if text.startswith(prompt):
+                        text = text[len(prompt):]
+                    if len(text) > len(sent):
+                        yield text[len(sent):]
+                        sent = text
+
+    @instrumented("vllm", "entailment_probs")
+    async def entailment_probs(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        if not pairs:
+            return []
+        resp = await get_http_client().post(
+            f"{self.completions_url}/v1/completions",
+            json=_entailment_request(pairs)
+        )
+        resp.raise_for_status()
+        return _parse_entailment(resp.json(), len(pairs))
+
+    async def extract_claims(self, text: str):
+        """Placeholder claim extraction (same as VLLMClient.extract_claims)."""
+        return [{"natural_text": text, "subject": "X", "predicate": "is", "object": "Y"}]
+
+
+class EntailmentBatcher(MicroBatcher):
+    """
+    Merges concurrent entailment requests (from any number of facts) into one
+    /v1/completions call of up to ENTAIL_BATCH_SIZE prompts.
+    """
+
+    def __init__(self, client: AsyncVLLMClient, max_batch_size: int = ENTAIL_BATCH_SIZE,
+                 max_wait_ms: float = ENTAIL_BATCH_WAIT_MS):
+        super().__init__(max_batch_size, max_wait_ms)
+        self.client = client
+
+    async def run_batch(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        return await self.client.entailment_probs(pairs)
+
+    async def score_many(self, claim: str, snippets: List[str]) -> List[float]:
+        return await self.submit_many([(claim, s) for s in snippets])
+
+
+vllm_client = VLLMClient(VLLM_URL)
+async_vllm_client = AsyncVLLMClient(VLLM_URL)
+entailment_batcher = EntailmentBatcher(async_vllm_client)
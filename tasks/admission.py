@@ -0,0 +1,243 @@
+# agno_pipeline/tasks/admission.py
+"""
+Admission control for the ingest endpoints, in front of enqueue():
+
+  - dedup: an idempotency key (client-supplied, or a hash of user/session/text) is
+    claimed with SET NX EX; a replay within INGEST_DEDUP_TTL_SECONDS gets the original
+    task id back instead of re-running extract -> embed -> write
+  - rate limit: token bucket per tenant (user_id), refilled at INGEST_RATE_PER_SECOND
+    up to INGEST_RATE_BURST, updated atomically in Redis
+  - backpressure: the target queue's broker depth (LLEN, cached briefly) must be below
+    INGEST_MAX_QUEUE_DEPTH so an ingest spike cannot starve verify
+
+Rejections carry a retry_after (seconds) for the 429 Retry-After header. If Redis is
+unreachable admission fails open: ingest keeps working, just without these guards.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from typing import Dict, List, Optional
+
+import redis
+
+from agno_pipeline.config import (
+    ADMISSION_REDIS_URL,
+    INGEST_DEDUP_TTL_SECONDS,
+    INGEST_RATE_PER_SECOND,
+    INGEST_RATE_BURST,
+    INGEST_MAX_QUEUE_DEPTH,
+    INGEST_QUEUE_DEPTH_CACHE_SECONDS,
+    INGEST_BACKPRESSURE_RETRY_SECONDS,
+)
+from agno_pipeline.tasks.celery_app import celery_app, REDIS_BROKER
+
+logger = logging.getLogger("ingest_admission")
+logger.setLevel(logging.INFO)
+
+PENDING = "pending"
+# fail open fast: admission must never be the reason /ingest hangs
+REDIS_TIMEOUTS = {"socket_timeout": 0.5, "socket_connect_timeout": 0.5}
+
+# KEYS: one bucket per tenant; ARGV: rate/s, burst, now (s), then one cost per key.
+# All buckets are charged or none is. Returns {allowed, retry_after_ms}.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local tokens = {}
+local retry_ms = 0
+for i, key in ipairs(KEYS) do
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local t = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    t = math.min(burst, t + math.max(0, now - ts) * rate)
+    local cost = tonumber(ARGV[3 + i])
+    if t < cost then
+        retry_ms = math.max(retry_ms, math.ceil((cost - t) / rate * 1000))
+    end
+    tokens[i] = t
+end
+local allowed = 0
+if retry_ms == 0 then
+    allowed = 1
+    for i = 1, #KEYS do
+        tokens[i] = tokens[i] - tonumber(ARGV[3 + i])
+    end
+end
+local ttl = math.ceil(burst / rate * 1000) + 1000
+for i, key in ipairs(KEYS) do
+    redis.call('HSET', key, 'tokens', tokens[i], 'ts', now)
+    redis.call('PEXPIRE', key, ttl)
+end
+return {allowed, retry_ms}
+"""
+
+
+class Rejected(Exception):
+    """Request refused by admission control; maps to 429 + Retry-After."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+def content_key(user_id: str, session_id: str, text: str, fused: bool = False) -> str:
+    """Dedup key for a request without a client idempotency key; whitespace-insensitive."""
+    normalized = " ".join(text.split())
+    digest = hashlib.sha256("\x00".join((user_id, session_id, normalized, str(fused))).encode("utf-8"))
+    return "h:" + digest.hexdigest()
+
+
+class RequestTooLarge(Exception):
+    """A tenant asked for more items in one request than its bucket can ever hold; maps to 413."""
+
+    def __init__(self, tenant: str, items: int, limit: int):
+        super().__init__(f"{items} items for {tenant} exceed the per-request limit of {limit}")
+        self.limit = limit
+
+
+class IngestAdmission:
+    """Redis-backed dedup, per-tenant token buckets and queue-depth backpressure."""
+
+    def __init__(self, url: str = ADMISSION_REDIS_URL, broker_url: str = REDIS_BROKER):
+        self.url = url
+        self.broker_url = broker_url
+        self._redis = None
+        self._broker = None
+        self._bucket = None
+        self._depths = {}
+        self._lock = threading.Lock()
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            with self._lock:
+                if self._redis is None:
+                    self._redis = redis.Redis.from_url(self.url, decode_responses=True, **REDIS_TIMEOUTS)
+        return self._redis
+
+    @property
+    def bucket(self):
+        if self._bucket is None:
+            self._bucket = self.redis.register_script(TOKEN_BUCKET_LUA)
+        return self._bucket
+
+    @property
+    def broker(self):
+        if self._broker is None:
+            self._broker = redis.Redis.from_url(self.broker_url, **REDIS_TIMEOUTS)
+        return self._broker
+
+    # ---- dedup ----
+    def claim(self, key: str) -> Optional[str]:
+        """
+        Claim an idempotency key. Returns None if it is new (caller proceeds), else the
+        task id recorded for it (PENDING while the first request is still enqueuing).
+        """
+        return self.claim_many([key])[0]
+
+    def claim_many(self, keys: List[str]) -> List[Optional[str]]:
+        """claim() for several keys in two pipelined round trips."""
+        if not keys:
+            return []
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for key in keys:
+                pipe.set(f"ingest:idem:{key}", PENDING, nx=True, ex=INGEST_DEDUP_TTL_SECONDS)
+            claimed = pipe.execute()
+            taken = [key for key, ok in zip(keys, claimed) if not ok]
+            prior = dict(zip(taken, self.redis.mget([f"ingest:idem:{k}" for k in taken]))) if taken else {}
+        except redis.RedisError:
+            logger.exception("Idempotency store unavailable; admitting %d requests", len(keys))
+            return [None] * len(keys)
+        return [None if ok else (prior.get(key) or PENDING) for key, ok in zip(keys, claimed)]
+
+    def record(self, task_id: str, *keys: str):
+        """Point claimed keys at the task that was enqueued for them."""
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for key in keys:
+                pipe.set(f"ingest:idem:{key}", task_id, xx=True, keepttl=True)
+            pipe.execute()
+        except redis.RedisError:
+            logger.exception("Could not record task %s for %d keys", task_id, len(keys))
+
+    def release(self, *keys: str):
+        """Forget claims whose request was not enqueued, so a retry is accepted."""
+        if not keys:
+            return
+        try:
+            self.redis.delete(*(f"ingest:idem:{key}" for key in keys))
+        except redis.RedisError:
+            logger.exception("Could not release %d keys", len(keys))
+
+    # ---- rate limit ----
+    def check_size(self, costs: Dict[str, int]):
+        """Raise RequestTooLarge if any tenant's share of a request can never fit its bucket."""
+        if INGEST_RATE_PER_SECOND <= 0:
+            return
+        for tenant, cost in costs.items():
+            if cost > INGEST_RATE_BURST:
+                raise RequestTooLarge(tenant, cost, INGEST_RATE_BURST)
+
+    def take(self, costs: Dict[str, int]):
+        """Spend {tenant: tokens} from each tenant's bucket, all or nothing, or raise Rejected."""
+        if INGEST_RATE_PER_SECOND <= 0 or not costs:
+            return
+        self.check_size(costs)
+        tenants = sorted(costs)
+        try:
+            allowed, retry_ms = self.bucket(
+                keys=[f"ingest:bucket:{t}" for t in tenants],
+                args=[INGEST_RATE_PER_SECOND, INGEST_RATE_BURST, time.time()] + [costs[t] for t in tenants],
+            )
+        except redis.RedisError:
+            logger.exception("Rate limiter unavailable; admitting %s", ", ".join(tenants))
+            return
+        if not allowed:
+            raise Rejected("rate_limited", int(retry_ms) / 1000.0)
+
+    # ---- backpressure ----
+    def queue_depth(self, queue: str) -> int:
+        """Broker list length for a Celery queue, cached for INGEST_QUEUE_DEPTH_CACHE_SECONDS."""
+        now = time.monotonic()
+        cached = self._depths.get(queue)
+        if cached is not None and now - cached[1] < INGEST_QUEUE_DEPTH_CACHE_SECONDS:
+            return cached[0]
+        depth = self.broker.llen(queue)
+        self._depths[queue] = (depth, now)
+        return depth
+
+    def check_backpressure(self, task_name: str):
+        if INGEST_MAX_QUEUE_DEPTH <= 0:
+            return
+        queue = celery_app.conf.task_routes.get(task_name, {}).get("queue", "celery")
+        try:
+            depth = self.queue_depth(queue)
+        except redis.RedisError:
+            logger.exception("Queue depth unavailable for %s; admitting", queue)
+            return
+        if depth >= INGEST_MAX_QUEUE_DEPTH:
+            raise Rejected("queue_full", INGEST_BACKPRESSURE_RETRY_SECONDS)
+
+    def admit(self, costs: Dict[str, int], task_name: str):
+        """Backpressure first (global, cached), then each tenant's bucket for its {tenant: items}."""
+        self.check_backpressure(task_name)
+        self.take(costs)
+
+    def close(self):
+        for client in (self._redis, self._broker):
+            if client is not None:
+                client.close()
+        self._redis = self._broker = self._bucket = None
+
+
+# Singleton instance (lazy: no connection until first use)
+ingest_admission = IngestAdmission()
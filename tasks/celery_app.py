@@ -13,6 +13,8 @@ celery_app = Celery(
 
 celery_app.conf.task_routes = {
     'tasks.ingest_claims': {'queue': 'ingest'},
+    'tasks.ingest_bulk': {'queue': 'ingest'},
+    'tasks.fused_pipeline': {'queue': 'pipeline'},
     'tasks.verify_claim': {'queue': 'verify'},
     'tasks.score_claim': {'queue': 'score'},
     'tasks.admit_claim': {'queue': 'admit'},
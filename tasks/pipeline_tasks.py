@@ -1,30 +1,44 @@
 # agno_pipeline/tasks/pipeline_tasks.py
-import asyncio
 from agno_pipeline.tasks.celery_app import celery_app
-from agno_pipeline.agents.ingestion import ingest_text
-from agno_pipeline.agents.verification import verify_fact
+from agno_pipeline.tasks.runtime import runtime
+from agno_pipeline.tasks.signatures import (
+    INGEST_CLAIMS, INGEST_BULK, FUSED_PIPELINE, VERIFY_CLAIM, SCORE_CLAIM, ADMIT_CLAIM, PRUNE_FACTS
+)
+from agno_pipeline.agents.ingestion import ingest_text, ingest_texts
+from agno_pipeline.agents.verifications import verify_fact
 from agno_pipeline.agents.scoring import score_fact
 from agno_pipeline.agents.memory import admit_fact
 from agno_pipeline.agents.pruning import prune_facts
+from agno_pipeline.agents.pipeline import run_fused_pipeline
 
-@celery_app.task(name='tasks.ingest_claims')
+@celery_app.task(name=INGEST_CLAIMS)
 def ingest_claims_task(payload: dict):
-    return asyncio.run(
+    return runtime.run(
         ingest_text(payload['user_id'], payload['session_id'], payload['text'], payload.get('tools'))
     )
 
-@celery_app.task(name='tasks.verify_claim')
+@celery_app.task(name=INGEST_BULK)
+def ingest_bulk_task(payload: dict):
+    return runtime.run(ingest_texts(payload['items']))
+
+@celery_app.task(name=FUSED_PIPELINE)
+def fused_pipeline_task(payload: dict):
+    return runtime.run(
+        run_fused_pipeline(payload['user_id'], payload['session_id'], payload['text'], payload.get('tools'))
+    )
+
+@celery_app.task(name=VERIFY_CLAIM)
 def verify_claim_task(payload: dict):
-    return asyncio.run(verify_fact(payload['fact_id']))
+    return runtime.run(verify_fact(payload['fact_id']))
 
-@celery_app.task(name='tasks.score_claim')
+@celery_app.task(name=SCORE_CLAIM)
 def score_claim_task(payload: dict):
-    return asyncio.run(score_fact(payload['fact_id']))
+    return runtime.run(score_fact(payload['fact_id']))
 
-@celery_app.task(name='tasks.admit_claim')
+@celery_app.task(name=ADMIT_CLAIM)
 def admit_claim_task(payload: dict):
-    return asyncio.run(admit_fact(payload['fact_id']))
+    return runtime.run(admit_fact(payload['fact_id']))
 
-@celery_app.task(name='tasks.prune_facts')
+@celery_app.task(name=PRUNE_FACTS)
 def prune_facts_task(payload: dict = None):
-    return asyncio.run(prune_facts())
+    return runtime.run(prune_facts())
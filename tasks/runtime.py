@@ -0,0 +1,150 @@
+# agno_pipeline/tasks/runtime.py
+import asyncio
+import logging
+import os
+import threading
+import time
+from billiard.process import current_process
+from celery.signals import (
+    worker_init, worker_process_init, worker_process_shutdown, task_prerun, task_postrun
+)
+
+from agno_pipeline.config import WORKER_METRICS_PORT
+from agno_pipeline.db.mongo_client import mongo_client
+from agno_pipeline.db.qdrant_client import qdrant_client
+from agno_pipeline.db.bootstrap import bootstrap_stores
+from agno_pipeline.db.outbox import outbox_flusher
+from agno_pipeline.models.http_client import close_http_client
+from agno_pipeline.metrics import (
+    TASK_LATENCY, TASK_IN_FLIGHT, start_metrics_server, mark_process_dead, multiprocess_enabled
+)
+
+logger = logging.getLogger("worker_runtime")
+logger.setLevel(logging.INFO)
+
+
+class WorkerRuntime:
+    """
+    One long-lived event loop per Celery worker process, running on a daemon thread.
+    Tasks submit coroutines with run(); the Mongo, Qdrant and HTTP clients are opened
+    once on that loop and reused by every task in the process, which also hosts the
+    Qdrant outbox flusher.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._bootstrap = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None and self._loop.is_running()
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+            loop.call_soon(started.set)
+            self._thread = threading.Thread(target=loop.run_forever, name="agno-worker-loop", daemon=True)
+            self._thread.start()
+            started.wait()
+            self._loop = loop
+        self.run(self._open_clients())
+        logger.info("Worker runtime started")
+
+    def run(self, coro):
+        """Run a coroutine on the worker loop and block until it finishes (starts lazily for solo/thread pools)."""
+        if not self.running:
+            self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def stop(self):
+        with self._lock:
+            if not self.running:
+                return
+            loop, thread = self._loop, self._thread
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_clients(), loop).result(timeout=10)
+        except Exception:
+            logger.exception("Error closing worker clients")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=10)
+        loop.close()
+        self._loop = self._thread = None
+        logger.info("Worker runtime stopped")
+
+    async def _open_clients(self):
+        # fresh clients per process: nothing inherited across fork, everything bound to this loop
+        mongo_client.connect()
+        qdrant_client.connect()
+        # bootstrap in the background so worker start never waits on Mongo or Qdrant
+        self._bootstrap = asyncio.get_running_loop().create_task(bootstrap_stores())
+        outbox_flusher.start()
+
+    async def _close_clients(self):
+        if self._bootstrap is not None:
+            self._bootstrap.cancel()
+        await outbox_flusher.stop()
+        try:
+            await outbox_flusher.flush_once()  # best-effort; anything left is flushed by another worker
+        except Exception:
+            logger.exception("Final outbox flush failed")
+        await close_http_client()
+        mongo_client.close()
+        qdrant_client.close()
+
+
+runtime = WorkerRuntime()
+
+
+def _serve_metrics(port: int):
+    try:
+        start_metrics_server(port)
+        logger.info("Worker metrics on :%d/metrics", port)
+    except OSError:
+        logger.exception("Could not start worker metrics server on port %d", port)
+
+
+@worker_process_init.connect
+def _on_worker_process_init(**kwargs):
+    runtime.start()
+    # prefork child: tasks and stages are recorded here, not in the parent. Without a
+    # shared PROMETHEUS_MULTIPROC_DIR each child serves its own registry on
+    # WORKER_METRICS_PORT + 1 + pool index (restarted children reuse their index).
+    if WORKER_METRICS_PORT and not multiprocess_enabled():
+        _serve_metrics(WORKER_METRICS_PORT + 1 + getattr(current_process(), "index", 0))
+
+
+@worker_process_shutdown.connect
+def _on_worker_process_shutdown(**kwargs):
+    runtime.stop()
+    mark_process_dead(os.getpid())
+
+
+@worker_init.connect
+def _on_worker_init(**kwargs):
+    # runs once in the parent: the aggregate of every process with PROMETHEUS_MULTIPROC_DIR,
+    # otherwise the parent's own metrics (all of them for the solo/threads pools)
+    if WORKER_METRICS_PORT:
+        _serve_metrics(WORKER_METRICS_PORT)
+
+
+_task_started = {}
+
+
+@task_prerun.connect
+def _on_task_prerun(task_id=None, task=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+    TASK_IN_FLIGHT.labels(task.name).inc()
+
+
+@task_postrun.connect
+def _on_task_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is None:
+        return
+    TASK_IN_FLIGHT.labels(task.name).dec()
+    TASK_LATENCY.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - started)
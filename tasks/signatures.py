@@ -0,0 +1,25 @@
+# agno_pipeline/tasks/signatures.py
+"""
+Task names and enqueue helpers for processes that only submit work (the API).
+Importing this loads the Celery app alone, not the agents, clients and models behind
+the task bodies in pipeline_tasks.py; routing still comes from celery_app.conf.task_routes.
+"""
+from agno_pipeline.tasks.celery_app import celery_app
+
+INGEST_CLAIMS = 'tasks.ingest_claims'
+INGEST_BULK = 'tasks.ingest_bulk'
+FUSED_PIPELINE = 'tasks.fused_pipeline'
+VERIFY_CLAIM = 'tasks.verify_claim'
+SCORE_CLAIM = 'tasks.score_claim'
+ADMIT_CLAIM = 'tasks.admit_claim'
+PRUNE_FACTS = 'tasks.prune_facts'
+
+
+def task_signature(name: str, payload: dict = None):
+    """Signature for chaining/grouping without importing the task function."""
+    return celery_app.signature(name, args=(payload,) if payload is not None else ())
+
+
+def enqueue(name: str, payload: dict = None):
+    """Send a task by name; returns its AsyncResult."""
+    return celery_app.send_task(name, args=(payload,) if payload is not None else ())
@@ -0,0 +1,21 @@
+# agno_pipeline/tests/conftest.py
+"""
+Shared fixtures: the store clients pointed at in-process stand-ins (the bench Mongo
+stub and an in-memory Qdrant), fresh for every test.
+"""
+import pytest
+
+
+@pytest.fixture
+def stores(monkeypatch):
+    from agno_pipeline.bench import mongo_stub
+    from agno_pipeline.db import mongo_client as mongo_module
+    from agno_pipeline.db import qdrant_client as qdrant_module
+
+    monkeypatch.setattr(mongo_module, "AsyncIOMotorClient", mongo_stub.InMemoryMongoClient)
+    monkeypatch.setattr(qdrant_module, "QDRANT_LOCATION", ":memory:")
+    mongo_module.mongo_client.connect()
+    qdrant_module.qdrant_client.close()
+    yield mongo_module.mongo_client, qdrant_module.qdrant_client
+    mongo_module.mongo_client.close()
+    qdrant_module.qdrant_client.close()
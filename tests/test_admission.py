@@ -0,0 +1,76 @@
+# agno_pipeline/tests/test_admission.py
+"""Token-bucket Lua script: refill, all-or-nothing charging across tenants, retry hints."""
+import pytest
+
+from agno_pipeline.tasks import admission
+from agno_pipeline.tasks.admission import IngestAdmission, Rejected, RequestTooLarge
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")  # fakeredis needs it to run Lua
+
+RATE, BURST = 2.0, 5
+
+
+@pytest.fixture
+def gate(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(admission, "INGEST_RATE_PER_SECOND", RATE)
+    monkeypatch.setattr(admission, "INGEST_RATE_BURST", BURST)
+    monkeypatch.setattr(admission.time, "time", lambda: clock[0])
+    gate = IngestAdmission()
+    gate._redis = fakeredis.FakeRedis(decode_responses=True)
+    return gate, clock
+
+
+def _tokens(gate, tenant):
+    return float(gate.redis.hget(f"ingest:bucket:{tenant}", "tokens"))
+
+
+def test_bucket_starts_full_and_refills(gate):
+    gate, clock = gate
+    gate.take({"u1": BURST})
+    with pytest.raises(Rejected) as exc:
+        gate.take({"u1": 1})
+    assert exc.value.reason == "rate_limited"
+    assert exc.value.retry_after == pytest.approx(1 / RATE)
+
+    clock[0] += 1.0  # two tokens back
+    gate.take({"u1": 2})
+    assert _tokens(gate, "u1") == pytest.approx(0.0)
+
+
+def test_refill_is_capped_at_burst(gate):
+    gate, clock = gate
+    gate.take({"u1": 1})
+    clock[0] += 3600.0
+    gate.take({"u1": 1})
+    assert _tokens(gate, "u1") == pytest.approx(BURST - 1)
+
+
+def test_multi_tenant_charge_is_all_or_nothing(gate):
+    gate, _ = gate
+    gate.take({"u2": 4})
+    with pytest.raises(Rejected) as exc:
+        gate.take({"u1": 3, "u2": 3})  # u1 could pay, u2 cannot
+    assert exc.value.retry_after == pytest.approx(2 / RATE)
+    assert _tokens(gate, "u1") == pytest.approx(BURST)
+    assert _tokens(gate, "u2") == pytest.approx(1.0)
+
+    gate.take({"u1": 3, "u2": 1})
+    assert _tokens(gate, "u1") == pytest.approx(2.0)
+    assert _tokens(gate, "u2") == pytest.approx(0.0)
+
+
+def test_request_larger_than_burst_is_refused_without_charging(gate):
+    gate, _ = gate
+    with pytest.raises(RequestTooLarge) as exc:
+        gate.take({"u1": 1, "u2": BURST + 1})
+    assert exc.value.limit == BURST
+    assert gate.redis.exists("ingest:bucket:u1") == 0
+
+
+def test_rate_limit_disabled(gate, monkeypatch):
+    gate, _ = gate
+    monkeypatch.setattr(admission, "INGEST_RATE_PER_SECOND", 0)
+    gate.take({"u1": BURST * 10})
+    assert gate.redis.exists("ingest:bucket:u1") == 0
@@ -0,0 +1,73 @@
+# agno_pipeline/tests/test_batching.py
+"""MicroBatcher: size/time flushes, per-caller results, error fan-out and loop rebinding."""
+import asyncio
+
+import pytest
+
+from agno_pipeline.models.batching import MicroBatcher
+
+
+class Recorder(MicroBatcher):
+    def __init__(self, max_batch_size=4, max_wait_ms=5.0, fail=False, short=False):
+        super().__init__(max_batch_size, max_wait_ms)
+        self.batches = []
+        self.fail = fail
+        self.short = short
+
+    async def run_batch(self, items):
+        self.batches.append(list(items))
+        await asyncio.sleep(0)
+        if self.fail:
+            raise ValueError("backend down")
+        results = [i * 10 for i in items]
+        return results[:-1] if self.short else results
+
+
+def test_run_batch_is_abstract():
+    with pytest.raises(TypeError):
+        MicroBatcher(1, 1.0)
+
+
+def test_concurrent_submits_share_batches_and_keep_order():
+    batcher = Recorder(max_batch_size=4)
+
+    async def go():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+
+    assert asyncio.run(go()) == [i * 10 for i in range(10)]
+    assert batcher.batches == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+
+
+def test_partial_batch_flushes_after_wait():
+    batcher = Recorder(max_batch_size=100, max_wait_ms=5.0)
+
+    async def go():
+        return await asyncio.wait_for(batcher.submit_many([1, 2, 3]), timeout=1.0)
+
+    assert asyncio.run(go()) == [10, 20, 30]
+    assert batcher.batches == [[1, 2, 3]]
+
+
+def test_batch_error_reaches_every_caller():
+    batcher = Recorder(fail=True)
+
+    async def go():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    assert all(isinstance(r, ValueError) for r in asyncio.run(go()))
+
+
+def test_result_count_mismatch_is_an_error():
+    batcher = Recorder(short=True)
+
+    async def go():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    results = asyncio.run(go())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_batcher_survives_a_new_event_loop():
+    batcher = Recorder(max_batch_size=100)
+    assert asyncio.run(batcher.submit(1)) == 10
+    assert asyncio.run(batcher.submit(2)) == 20
@@ -0,0 +1,45 @@
+# agno_pipeline/tests/test_imports.py
+"""
+Import smoke test: every module must import without any server running (clients are
+lazy), and the worker module must register every task the API enqueues by name.
+"""
+import importlib
+
+import pytest
+
+MODULES = [
+    "agno_pipeline.config",
+    "agno_pipeline.metrics",
+    "agno_pipeline.main",
+    "agno_pipeline.tasks.celery_app",
+    "agno_pipeline.tasks.signatures",
+    "agno_pipeline.tasks.admission",
+    "agno_pipeline.tasks.runtime",
+    "agno_pipeline.tasks.pipeline_tasks",
+    "agno_pipeline.agents.ingestion",
+    "agno_pipeline.agents.verifications",
+    "agno_pipeline.agents.scoring",
+    "agno_pipeline.agents.memory",
+    "agno_pipeline.agents.pruning",
+    "agno_pipeline.agents.pipeline",
+    "agno_pipeline.agents.query_time",
+    "agno_pipeline.agents.context",
+    "agno_pipeline.db.outbox",
+    "agno_pipeline.db.bootstrap",
+]
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_module_imports(module):
+    importlib.import_module(module)
+
+
+def test_worker_registers_every_enqueued_task():
+    from agno_pipeline.tasks import signatures
+    from agno_pipeline.tasks.celery_app import celery_app
+    importlib.import_module("agno_pipeline.tasks.pipeline_tasks")
+
+    names = [v for k, v in vars(signatures).items() if k.isupper() and isinstance(v, str) and v.startswith("tasks.")]
+    assert names
+    missing = [n for n in names if n not in celery_app.tasks]
+    assert not missing, f"tasks enqueued by the API but not registered by the worker: {missing}"
@@ -0,0 +1,143 @@
+# agno_pipeline/tests/test_outbox.py
+"""Outbox coalescing, version-checked acks, lease release and parking, against in-process stores."""
+import asyncio
+import uuid
+
+import numpy as np
+import pytest
+
+from agno_pipeline.config import QDRANT_COLLECTION, QDRANT_VECTOR_DIM
+from agno_pipeline.db.outbox import QdrantOutbox, OutboxFlusher
+
+
+def _vec(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal(QDRANT_VECTOR_DIM).astype(np.float32)
+
+
+def _point(qdrant, fact_id: str):
+    points = qdrant.client.retrieve(QDRANT_COLLECTION, [fact_id], with_payload=True, with_vectors=True)
+    return points[0] if points else None
+
+
+@pytest.fixture
+def outbox(stores):
+    box = QdrantOutbox(enabled=True)
+    return box, OutboxFlusher(box, max_attempts=2)
+
+
+def test_upsert_is_flushed_and_acked(stores, outbox):
+    _, qdrant = stores
+    box, flusher = outbox
+    fid = str(uuid.uuid4())
+
+    async def go():
+        await box.upsert([(fid, _vec(1), {"status": "staging", "user_id": "u1"})])
+        assert qdrant.existing_ids([fid]) == set()
+        assert await flusher.drain() == 1
+        return await box.collection.count_documents({})
+
+    assert asyncio.run(go()) == 0
+    point = _point(qdrant, fid)
+    assert point.payload["status"] == "staging"
+    assert np.allclose(point.vector, _vec(1) / np.linalg.norm(_vec(1)), atol=1e-5)
+
+
+def test_set_payload_coalesces_into_pending_upsert(stores, outbox):
+    _, qdrant = stores
+    box, flusher = outbox
+    fid = str(uuid.uuid4())
+
+    async def go():
+        await box.upsert([(fid, _vec(2), {"status": "staging", "trust": 0.5})])
+        await box.set_payload({fid: {"status": "production"}})
+        rec = await box.collection.find_one({"_id": fid})
+        await flusher.drain()
+        return rec
+
+    rec = asyncio.run(go())
+    assert rec["op"] == "upsert" and rec["version"] == 2
+    assert rec["payload"] == {"status": "production", "trust": 0.5}
+    assert _point(qdrant, fid).payload == {"status": "production", "trust": 0.5}
+
+
+def test_delete_supersedes_pending_writes(stores, outbox):
+    _, qdrant = stores
+    box, flusher = outbox
+    flushed, pending = str(uuid.uuid4()), str(uuid.uuid4())
+
+    async def go():
+        await box.upsert([(flushed, _vec(3), {"status": "staging"})])
+        await flusher.drain()
+        await box.upsert([(pending, _vec(4), {"status": "staging"})])
+        await box.set_payload({flushed: {"status": "production"}})
+        await box.delete([flushed, pending])
+        recs = await box.collection.find({}).to_list(length=None)
+        await flusher.drain()
+        return recs
+
+    recs = asyncio.run(go())
+    assert {r["op"] for r in recs} == {"delete"}
+    assert all("vector" not in r and "payload" not in r for r in recs)
+    assert qdrant.existing_ids([flushed, pending]) == set()
+
+
+def test_write_during_flush_is_not_acked(stores, outbox):
+    _, qdrant = stores
+    box, flusher = outbox
+    fid = str(uuid.uuid4())
+
+    async def go():
+        await box.upsert([(fid, _vec(5), {"status": "staging"})])
+        records = await flusher._claim("t1")
+        await box.set_payload({fid: {"status": "production"}})  # lands mid-flush
+        await flusher._settle(records, {}, "t1")
+        rec = await box.collection.find_one({"_id": fid})
+        flushed = await flusher.drain()
+        return rec, flushed
+
+    rec, flushed = asyncio.run(go())
+    assert rec["version"] == 2
+    assert rec["lease_until"] == 0.0 and "lease_owner" not in rec
+    assert flushed == 1
+    assert _point(qdrant, fid).payload["status"] == "production"
+
+
+def test_failing_record_backs_off_then_parks(stores, outbox, monkeypatch):
+    _, qdrant = stores
+    box, flusher = outbox
+    fid = str(uuid.uuid4())
+
+    def fail(points):
+        raise RuntimeError("qdrant down")
+
+    monkeypatch.setattr(qdrant, "upsert_facts", fail)
+
+    async def go():
+        await box.upsert([(fid, _vec(6), {"status": "staging"})])
+        await flusher.flush_once()
+        first = await box.collection.find_one({"_id": fid})
+        await box.collection.update_one({"_id": fid}, {"$set": {"next_attempt_at": 0.0}})
+        await flusher.flush_once()
+        parked = await box.collection.find_one({"_id": fid})
+        return first, parked, await flusher.drain(), await box.nearest_pending([_vec(6)], 0.9)
+
+    first, parked, drained, nearest = asyncio.run(go())
+    assert first["attempts"] == 1 and not first["dead"] and first["lease_until"] == 0.0
+    assert parked["attempts"] == 2 and parked["dead"] and parked["next_attempt_at"] == float("inf")
+    assert drained == 0
+    assert nearest == [None]
+
+
+def test_nearest_pending_respects_scope_and_status(stores, outbox):
+    box, _ = outbox
+    mine, rejected = str(uuid.uuid4()), str(uuid.uuid4())
+
+    async def go():
+        await box.upsert([(mine, _vec(7), {"status": "staging", "user_id": "u1"}),
+                          (rejected, _vec(8), {"status": "rejected", "user_id": "u1"})])
+        return (await box.nearest_pending([_vec(7), _vec(8), _vec(9)], 0.9),
+                await box.nearest_pending([_vec(7)], 0.9, user_ids=["u2"]))
+
+    unscoped, other_user = asyncio.run(go())
+    assert unscoped == [mine, None, None]
+    assert other_user == [None]